@@ -29,6 +29,11 @@ import numpy.ma as nma
 from casacore.images.coordinates import coordinatesystem
 
 
+def _daskimagechunk(name, blc, trc):
+    """Read a chunk of an image for a dask array (see image.to_dask)."""
+    return image(name).getdata(blc, trc)
+
+
 class image(Image):
     """The Python interface to casacore images.
 
@@ -283,7 +288,7 @@ class image(Image):
            of an attribute in a row in a group."""
         return self._attrput(groupname, attrname, rownr, value, unit, meas)
 
-    def getdata(self, blc=(), trc=(), inc=()):
+    def getdata(self, blc=(), trc=(), inc=(), out=None):
         """Get image data.
 
         Using the arguments blc (bottom left corner), trc (top right corner),
@@ -292,13 +297,56 @@ class image(Image):
         The data is returned as a numpy array. Its dimensionality is the same
         as the dimensionality of the image, even if an axis has length 1.
 
+        `out` can be a numpy array (possibly a non-contiguous view) with the
+        shape of the slice into which the data are copied and which is
+        returned.
+
         """
-        return self._getdata(self._adjustBlc(blc),
+        data = self._getdata(self._adjustBlc(blc),
                              self._adjustTrc(trc),
                              self._adjustInc(inc))
+        if out is None:
+            return data
+        out[...] = data
+        return out
+
+    def to_dask(self, chunks=None):
+        """Get the image data as a lazy dask array.
+
+        Nothing is read until (part of) the array is computed; each chunk is
+        read by reopening the image by name and doing a :func:`getdata`.
+        Thus the image must be persistent, but the array can be computed by
+        any dask scheduler, also one using multiple processes. The mask is
+        not part of the array (use :func:`getmask` for it).
+
+        `chunks`
+          The chunk shape as accepted by dask (e.g. (1, 1, -1, -1)).
+          By default the chunks consist of whole tiles of a PagedImage
+          and contain about 64 MB.
+
+        """
+        from casacore.tables.tablehelper import (_daskarray, _daskchunks,
+                                                 _tiledcubes)
+        if not self.ispersistent():
+            raise ValueError('Only a persistent image can be converted'
+                             ' to a dask array')
+        shape = self.shape()
+        dtype = self.getdata([0] * len(shape), [0] * len(shape)).dtype
+        if chunks is None:
+            tileshape = [1] * len(shape)
+            if self.imagetype() == 'PagedImage':
+                from casacore.tables import table
+                cubes = _tiledcubes(table(self.name(), ack=False)
+                                    .getdminfo('map'))
+                if len(cubes) == 1:
+                    # A PagedImage is stored in a single row.
+                    tileshape = cubes[0][1][-len(shape):]
+            chunks = _daskchunks(shape, tileshape, dtype.itemsize)
+        return _daskarray('casacore-image', _daskimagechunk, (self.name(),),
+                          shape, chunks, dtype)
 
     # Negate the mask; in numpy True means invalid.
-    def getmask(self, blc=(), trc=(), inc=()):
+    def getmask(self, blc=(), trc=(), inc=(), out=None):
         """Get image mask.
 
         Using the arguments blc (bottom left corner), trc (top right corner),
@@ -315,10 +363,15 @@ class image(Image):
         If the image has no mask, an array will be returned with all values
         set to False.
 
+        `out` can be a boolean numpy array (possibly a non-contiguous view)
+        with the shape of the slice into which the mask is written and which
+        is returned.
+
         """
         return numpy.logical_not(self._getmask(self._adjustBlc(blc),
                                                self._adjustTrc(trc),
-                                               self._adjustInc(inc)))
+                                               self._adjustInc(inc)),
+                                 out=out)
 
     # Get data and mask
     def get(self, blc=(), trc=(), inc=()):
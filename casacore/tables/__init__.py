@@ -50,6 +50,8 @@ The `tables` module consists of a few classes:
   iterate through a table based on the contents of one or more columns
 :class:`tableindex`
   build and use an index on one or more table columns
+:class:`tableselection`
+  describe a (selected) table such that it can be passed to other processes
 submodule `tableutil <#table-utility-functions>`_
   table utility functions (e.g. to create a table description)
 submodule `msutil <#measurementset-utility-functions>`_
@@ -67,4 +69,5 @@ from .tablecolumn import tablecolumn
 from .tableindex import tableindex
 from .tableiter import tableiter
 from .tablerow import tablerow
+from .tableselection import tableselection
 from .tableutil import *
@@ -28,7 +28,8 @@ from casacore.tables.table import (table, taql,
                                    _required_ms_desc,
                                    _complete_ms_desc)
 from casacore.tables.tableutil import (makescacoldesc, makearrcoldesc,
-                                       makecoldesc, maketabdesc)
+                                       makecoldesc, maketabdesc, tabledelete,
+                                       _retiledminfo)
 
 
 def required_ms_desc(table=None):
@@ -224,7 +225,8 @@ def removeDerivedMSCal(msname):
     t.flush()
 
 
-def msconcat(names, newname, concatTime=False):
+def msconcat(names, newname, concatTime=False, physical=False,
+             access='row', nproc=1, progress=False):
     """Virtually concatenate multiple MeasurementSets.
 
     Multiple MeasurementSets are concatenated into a single MeasurementSet.
@@ -263,11 +265,40 @@ def msconcat(names, newname, concatTime=False):
     `concatTime`
       False means that the spectral windows ids will be adjusted as explained
       above.
+    `physical`
+      True means that a physically concatenated MS is created instead of a
+      virtual one. Tools read such an MS much faster, because they do not
+      have to go through the parts of a concatenation. The rows are sorted
+      in order of TIME, DATA_DESC_ID, ANTENNA1, ANTENNA2 and the array
+      columns get a tile shape suited for the `access` pattern ('row',
+      'channel' or 'baseline'; see :func:`retile`).
+      The data are copied in chunks into the output MS for which all rows are
+      allocated beforehand, while the subtables are copied using `nproc`
+      processes (see :func:`table.copy` which also explains `progress`).
+      Only the MS `<newname>` is kept.
 
     """
 
     if len(names) == 0:
         raise ValueError('No input MSs given')
+    if physical:
+        # Make a virtual concatenation first and copy it in sorted order.
+        tmpname = newname + '_VIRTUAL'
+        msconcat(names, tmpname, concatTime)
+        t0 = table(names[0], ack=False)
+        tv = table(tmpname, ack=False)
+        dminfo = _retiledminfo(t0, [], access, 1048576, tv.nrows(),
+                               False)[0]
+        tsort = tv.sort('TIME,DATA_DESC_ID,ANTENNA1,ANTENNA2')
+        tnew = tsort.copy(newname, deep=True, valuecopy=True, dminfo=dminfo,
+                          chunkrows=tsort._chunkrows(0), nproc=nproc,
+                          progress=progress)
+        for t in (tnew, tsort, tv, t0):
+            t.close()
+        tabledelete(tmpname, ack=False)
+        if not concatTime:
+            tabledelete(tmpname + '_CONCAT', ack=False)
+        return
     # Concatenation in time is straightforward.
     if concatTime:
         t = table(names[0])
@@ -389,42 +420,41 @@ def msregularize(msname, newname):
     input MS.
     """
 
-    # Find out all baselines.
+    # Read the columns defining the time/band chunks and baselines once.
     t = table(msname)
-    t1 = t.sort('unique ANTENNA1,ANTENNA2')
-    nadded = 0
-    # Now iterate in time,band over the MS.
-    for tsub in t.iter(['TIME', 'DATA_DESC_ID']):
-        nmissing = t1.nrows() - tsub.nrows()
-        if nmissing < 0:
-            raise ValueError("A time/band chunk has too many rows")
-        if nmissing > 0:
-            # Rows needs to be added for the missing baselines.
-            ant1 = str(t1.getcol('ANTENNA1')).replace(' ', ',')
-            ant2 = str(t1.getcol('ANTENNA2')).replace(' ', ',')
-            ant1 = tsub.getcol('ANTENNA1')
-            ant2 = tsub.getcol('ANTENNA2')
-            t2 = taql('select from $t1 where !any(ANTENNA1 == $ant1 &&' +
-                      ' ANTENNA2 == $ant2)')
-            print(nmissing, t1.nrows(), tsub.nrows(), t2.nrows())
-            if t2.nrows() != nmissing:
-                raise ValueError("A time/band chunk behaves strangely")
-            # If nothing added yet, create a new table.
-            # (which has to be reopened for read/write).
-            # Otherwise append to that new table.
-            if nadded == 0:
-                tnew = t2.copy(newname + "_add", deep=True)
-                tnew = table(newname + "_add", readonly=False)
-            else:
-                t2.copyrows(tnew)
-            # Set the correct time and band in the new rows.
-            tnew.putcell('TIME',
-                         range(nadded, nadded + nmissing),
-                         tsub.getcell('TIME', 0))
-            tnew.putcell('DATA_DESC_ID',
-                         range(nadded, nadded + nmissing),
-                         tsub.getcell('DATA_DESC_ID', 0))
-            nadded += nmissing
+    time = t.getcol('TIME')
+    ddid = t.getcol('DATA_DESC_ID')
+    ant1 = t.getcol('ANTENNA1')
+    ant2 = t.getcol('ANTENNA2')
+    # Find out all baselines and the first row containing each of them.
+    # Those rows serve as template for rows to be added.
+    nant = max(ant1.max(initial=0), ant2.max(initial=0)) + 1
+    blkeys, blrows, blinx = np.unique(ant1.astype(np.int64) * nant + ant2,
+                                      return_index=True, return_inverse=True)
+    nbl = len(blkeys)
+    # Number the time/band chunks.
+    utime, tinx = np.unique(time, return_inverse=True)
+    uddid, dinx = np.unique(ddid, return_inverse=True)
+    chunks = tinx.astype(np.int64) * len(uddid) + dinx
+    # Find the missing (chunk,baseline) combinations.
+    present = chunks * nbl + blinx
+    upresent = np.unique(present)
+    if len(upresent) != len(present):
+        raise ValueError("A time/band chunk contains a baseline multiple "
+                         "times")
+    allkeys = np.unique(chunks)[:, np.newaxis] * nbl + np.arange(nbl)
+    missing = np.setdiff1d(allkeys.ravel(), upresent, assume_unique=True)
+    nadded = len(missing)
+    if nadded > 0:
+        # Create the table with all rows to be added in one go by copying
+        # the template rows of the missing baselines.
+        # Set the correct time and band in the new rows.
+        mchunks = missing // nbl
+        t2 = t.selectrows(blrows[missing % nbl])
+        t2.copy(newname + "_add", deep=True)
+        tnew = table(newname + "_add", readonly=False)
+        tnew.putcol('TIME', utime[mchunks // len(uddid)])
+        tnew.putcol('DATA_DESC_ID', uddid[mchunks % len(uddid)])
     # Combine the existing table and new table.
     if nadded > 0:
         # First initialize data and flags in the added rows.
@@ -441,3 +471,927 @@ def msregularize(msname, newname):
         print(' and', newname + '_adds', 'containing', nadded, 'new rows')
     else:
         print(' no rows needed to be added')
+
+
+# The columns of a MeasurementSet containing a channel axis.
+_msdatacolumns = ['DATA', 'FLOAT_DATA', 'CORRECTED_DATA', 'MODEL_DATA']
+_mschancolumns = _msdatacolumns + ['FLAG', 'WEIGHT_SPECTRUM',
+                                   'SIGMA_SPECTRUM', 'IMAGING_WEIGHT']
+
+
+def _groupsum(values, starts, chanstarts=None):
+    """Sum values per group of rows (and channels) given their start."""
+    result = np.add.reduceat(values, starts, axis=0)
+    if chanstarts is not None:
+        result = np.add.reduceat(result, chanstarts, axis=1)
+    return result
+
+
+def _timebins(t, time, timebin):
+    """Number the output time slots of msaverage in time order.
+
+    The time slots are counted within each group of rows having the same
+    OBSERVATION_ID, ARRAY_ID, SCAN_NUMBER and FIELD_ID (when present), so
+    rows of different groups are never in the same output time slot.
+
+    """
+    nrow = len(time)
+    groupcols = [col for col in ('OBSERVATION_ID', 'ARRAY_ID',
+                                 'SCAN_NUMBER', 'FIELD_ID')
+                 if col in t.colnames()]
+    if nrow == 0:
+        return np.zeros(0, np.int64)
+    groupnr = np.zeros(nrow, np.int64)
+    if len(groupcols) > 0:
+        groupnr = np.unique(np.stack([t.getcol(col) for col in groupcols], 1),
+                            axis=0, return_inverse=True)[1].ravel()
+    utime, timenr = np.unique(time, return_inverse=True)
+    ntime = len(utime)
+    # The unique (group, time) pairs are sorted by group, then time.
+    pairs, pairnr = np.unique(groupnr * ntime + timenr.ravel(),
+                              return_inverse=True)
+    pairgroup = pairs // ntime
+    slot = np.arange(len(pairs)) - np.searchsorted(pairgroup, pairgroup)
+    bins, first = np.unique(pairgroup * ntime + slot // timebin,
+                            return_index=True)
+    # Order the bins by their first time.
+    binorder = np.lexsort((bins, pairs[first] % ntime))
+    binrank = np.empty(len(bins), np.int64)
+    binrank[binorder] = np.arange(len(bins))
+    binnr = np.searchsorted(bins, pairgroup * ntime + slot // timebin)
+    return binrank[binnr][pairnr.ravel()]
+
+
+def msaverage(msname, newname, timebin=1, chanbin=1, columns=None,
+              chunkrows=0):
+    """Average a MeasurementSet in time and/or frequency.
+
+    A new MeasurementSet is created where the data of each baseline are
+    averaged over `timebin` time slots and `chanbin` channels. The time
+    slots are the unique times per observation, array, scan and field,
+    thus their first `timebin` times form the first output time slot, etc.
+    Data of different fields or scans are never averaged together.
+
+    The averaging is flag-aware: flagged data are ignored and the weights
+    (WEIGHT_SPECTRUM or otherwise WEIGHT) are used to form a weighted
+    average. An output data point is only flagged if all its input data
+    points are flagged, in which case the average of the flagged data is
+    written. The output weight of a data point is the sum of the weights of
+    its unflagged input data points. WEIGHT and SIGMA are derived from
+    them. TIME, TIME_CENTROID and UVW are averaged, INTERVAL and EXPOSURE
+    are summed. The other columns (e.g. FIELD_ID, SCAN_NUMBER) are taken from
+    the first row of an averaging group. The SPECTRAL_WINDOW subtable is
+    updated for the averaged channels.
+
+    `columns`
+      The data columns to average. By default all of DATA, FLOAT_DATA,
+      CORRECTED_DATA and MODEL_DATA being present are averaged.
+      Other columns with a channel axis are not part of the output MS.
+    `chunkrows`
+      The number of input rows averaged at a time. By default chunks of
+      about 64 MB are used.
+
+    The rows of the MS are sorted once in order of output time slot, data
+    description id and baseline, whereafter the data are read, averaged
+    and written in chunks.
+    The output MS is ordered in that way as well.
+
+    For example::
+
+      msaverage('3c343.MS', '3c343_avg.MS', timebin=10, chanbin=4)
+
+    """
+    from .tablehelper import _tiled_itemsize, _tileshape
+    t = table(msname, ack=False)
+    colnames = t.colnames()
+    if columns is None:
+        columns = [col for col in _msdatacolumns if col in colnames]
+    elif isinstance(columns, str):
+        columns = [columns]
+    nrow = t.nrows()
+    speccols = columns + ['FLAG']
+    for col in ('WEIGHT_SPECTRUM', 'SIGMA_SPECTRUM'):
+        if col in colnames and nrow > 0 and t.iscelldefined(col, 0):
+            speccols.append(col)
+    hasws = 'WEIGHT_SPECTRUM' in speccols
+    # Sort the rows once to find the averaging groups.
+    time = t.getcol('TIME')
+    keys = [_timebins(t, time, timebin), t.getcol('DATA_DESC_ID'),
+            t.getcol('ANTENNA1'), t.getcol('ANTENNA2')]
+    order = np.lexsort([time] + keys[::-1])
+    newgroup = np.zeros(nrow, bool)
+    newgroup[:1] = True
+    for key in keys:
+        newgroup[1:] |= np.diff(key[order]) != 0
+    groupnr = np.cumsum(newgroup) - 1
+    firstrows = order[newgroup]
+    nout = len(firstrows)
+    # Create the output MS with all subtables, but without rows.
+    # The columns with a channel axis are created with a variable shape.
+    chunkrows = t._chunkrows(chunkrows)
+    tout = t.copy(newname, deep=True, copynorows=True, chunkrows=chunkrows)
+    tout.removecols([col for col in _mschancolumns if col in colnames])
+    for col in speccols:
+        desc = t.getcoldesc(col)
+        cellshape = list(t.getcell(col, 0).shape) if nrow > 0 else []
+        desc.pop('shape', None)
+        desc['option'] = 0
+        desc['ndim'] = len(cellshape) if cellshape else desc.get('ndim', 2)
+        if cellshape:
+            cellshape[0] = (cellshape[0] + chanbin - 1) // chanbin
+        tileshape = _tileshape(cellshape, nout,
+                               _tiled_itemsize[t.coldatatype(col)],
+                               'row', 1048576)
+        tout.addcols(makecoldesc(col, desc),
+                     dminfo={'TYPE': 'TiledShapeStMan',
+                             'NAME': 'Tiled_' + col,
+                             'SPEC': {'DEFAULTTILESHAPE': tileshape}})
+    # Copy the other columns from the first row in each group.
+    othercols = [col for col in tout.colnames() if col in colnames and
+                 col not in _mschancolumns + ['FLAG_CATEGORY']]
+    tout.addrows(nout)
+    t.selectrows(firstrows).select(','.join(othercols)).copyrows(tout, 0, 0)
+    # Average the data in chunks of entire time slots.
+    ends = np.flatnonzero(np.diff(keys[0][order])) + 1
+    chunkends = ends[np.diff(ends // chunkrows, prepend=0) > 0]
+    for rows in np.split(np.arange(nrow), chunkends):
+        inrows = order[rows]
+        ddids = keys[1][inrows]
+        for ddid in np.unique(ddids):
+            inx = rows[ddids == ddid]
+            outrows = groupnr[inx]
+            starts = np.flatnonzero(np.diff(outrows, prepend=-1))
+            outrows = outrows[starts]
+            tin = t.selectrows(order[inx])
+            tsel = tout.selectrows(outrows)
+            _averagechunk(tin, tsel, starts, chanbin, columns, hasws,
+                          'SIGMA_SPECTRUM' in speccols)
+    tout.flush()
+    # Update the channels in the SPECTRAL_WINDOW subtable.
+    if chanbin > 1:
+        tspw = table(tout.getkeyword('SPECTRAL_WINDOW'), readonly=False,
+                     ack=False)
+        for rownr in range(tspw.nrows()):
+            nchan = tspw.getcell('NUM_CHAN', rownr)
+            chanstarts = np.arange(0, nchan, chanbin)
+            counts = np.diff(np.append(chanstarts, nchan))
+            for col in ('CHAN_FREQ', 'CHAN_WIDTH', 'EFFECTIVE_BW',
+                        'RESOLUTION'):
+                if tspw.iscelldefined(col, rownr):
+                    val = np.add.reduceat(tspw.getcell(col, rownr),
+                                          chanstarts)
+                    if col == 'CHAN_FREQ':
+                        val /= counts
+                    tspw.putcell(col, rownr, val)
+            tspw.putcell('NUM_CHAN', rownr, len(chanstarts))
+        tspw.close()
+    tout.close()
+
+
+def _averagechunk(tin, tout, starts, chanbin, columns, hasws, hasss):
+    """Average the rows of tin into tout (see msaverage)."""
+    counts = np.diff(np.append(starts, tin.nrows()))
+    for col in ('TIME', 'TIME_CENTROID', 'UVW'):
+        val = _groupsum(tin.getcol(col), starts)
+        tout.putcol(col, (val.T / counts).T)
+    for col in ('INTERVAL', 'EXPOSURE'):
+        tout.putcol(col, _groupsum(tin.getcol(col), starts))
+    flag = tin.getcol('FLAG')
+    nchan = flag.shape[1]
+    chanstarts = np.arange(0, nchan, chanbin)
+    if hasws:
+        weight = tin.getcol('WEIGHT_SPECTRUM')
+    else:
+        weight = np.broadcast_to(tin.getcol('WEIGHT')[:, np.newaxis, :],
+                                 flag.shape)
+    wflag = np.where(flag, 0, weight)
+    sumwflag = _groupsum(wflag, starts, chanstarts)
+    sumweight = _groupsum(weight, starts, chanstarts)
+    nunflagged = _groupsum((~flag).astype(np.int64), starts, chanstarts)
+    newflag = nunflagged == 0
+    # Average the unflagged data or, if all flagged, the flagged data.
+    # If all weights are zero, the plain average is used.
+    npoint = _groupsum(np.ones(flag.shape, np.int64), starts, chanstarts)
+    for col in columns:
+        data = tin.getcol(col)
+        sumw = np.where(newflag, sumweight, sumwflag)
+        sumd = np.where(newflag, _groupsum(weight * data, starts, chanstarts),
+                        _groupsum(wflag * data, starts, chanstarts))
+        plain = _groupsum(data, starts, chanstarts) / npoint
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg = np.where(sumw > 0, sumd / sumw, plain)
+        tout.putcol(col, avg.astype(data.dtype))
+    tout.putcol('FLAG', newflag)
+    tout.putcol('FLAG_ROW', newflag.all(axis=(1, 2)))
+    newweight = sumwflag.astype(np.float32)
+    rowweight = newweight.mean(axis=1)
+    with np.errstate(divide='ignore'):
+        tout.putcol('WEIGHT', rowweight)
+        tout.putcol('SIGMA', np.where(rowweight > 0,
+                                      1 / np.sqrt(rowweight), 0))
+        if hasws:
+            tout.putcol('WEIGHT_SPECTRUM', newweight)
+        if hasss:
+            tout.putcol('SIGMA_SPECTRUM',
+                        np.where(newweight > 0, 1 / np.sqrt(newweight), 0))
+
+
+def baseline_index(ms, cachefile=None):
+    """Make an index giving the rows of each baseline in a MeasurementSet.
+
+    A MeasurementSet is usually ordered in time, so the rows of a baseline
+    are spread over the entire MS. Finding them with a query needs a scan
+    over all rows for each baseline. This function reads the ANTENNA1 and
+    ANTENNA2 columns once and returns a :class:`baselineindex` object
+    holding the row numbers of each baseline.
+
+    `ms`
+      The MS (a :class:`table` object or the name of the MS).
+    `cachefile`
+      If given, the name of a file (in numpy .npz format) in which the
+      index is stored, so it does not need to be made again the next time.
+      It is remade if the number of rows or the contents of ANTENNA1 and
+      ANTENNA2 (checked using a checksum) have changed since.
+      Note that the file is not part of the MS, so it is not copied,
+      renamed or deleted with the MS.
+
+    For example::
+
+      bli = baseline_index('3c343.MS', cachefile='3c343_blindex.npz')
+      vis = bli.getbaseline(0, 1, ['TIME', 'DATA'])
+
+    """
+    import hashlib
+    import os
+    if isinstance(ms, str):
+        ms = table(ms, ack=False)
+    ant1 = ms.getcol('ANTENNA1')
+    ant2 = ms.getcol('ANTENNA2')
+    checksum = None
+    if cachefile is not None:
+        checksum = hashlib.sha256(np.ascontiguousarray(ant1).tobytes() +
+                                  np.ascontiguousarray(ant2).tobytes())
+        checksum = checksum.hexdigest()
+        if os.path.exists(cachefile):
+            with np.load(cachefile) as index:
+                if (int(index['nrow']) == len(ant1) and
+                        str(index['checksum']) == checksum):
+                    return baselineindex(ms, index['baselines'],
+                                         index['rownrs'], index['offsets'])
+    # Sort the rows on baseline, keeping the time order of each baseline.
+    rownrs = np.lexsort((ant2, ant1))
+    newbl = np.diff(ant1[rownrs], prepend=-1) != 0
+    newbl |= np.diff(ant2[rownrs], prepend=-1) != 0
+    starts = np.flatnonzero(newbl)
+    baselines = np.stack([ant1[rownrs[starts]], ant2[rownrs[starts]]], 1)
+    offsets = np.append(starts, len(rownrs))
+    if cachefile is not None:
+        with open(cachefile, 'wb') as f:
+            np.savez(f, nrow=len(ant1), checksum=checksum,
+                     baselines=baselines, rownrs=rownrs, offsets=offsets)
+    return baselineindex(ms, baselines, rownrs, offsets)
+
+
+class baselineindex:
+    """Index giving the rows of each baseline in a MeasurementSet.
+
+    A `baselineindex` is made by :func:`baseline_index`.
+    The row numbers of a baseline are kept in increasing order, so reading
+    the data of a baseline accesses the MS in its storage order.
+    The index does not change if the MS changes.
+
+    """
+
+    def __init__(self, ms, baselines, rownrs, offsets):
+        self._table = ms
+        self._baselines = baselines
+        self._rownrs = rownrs
+        self._offsets = offsets
+        self._bldict = {(int(a1), int(a2)): i
+                        for i, (a1, a2) in enumerate(baselines)}
+
+    def __len__(self):
+        """Return the number of baselines."""
+        return len(self._baselines)
+
+    def baselines(self):
+        """Return the baselines as an array of [ANTENNA1,ANTENNA2] pairs."""
+        return self._baselines
+
+    def rownumbers(self, ant1, ant2):
+        """Return the row numbers of a baseline.
+
+        An empty array is returned if the baseline does not exist.
+
+        """
+        inx = self._bldict.get((ant1, ant2))
+        if inx is None:
+            return self._rownrs[:0]
+        return self._rownrs[self._offsets[inx]:self._offsets[inx + 1]]
+
+    def selectbaseline(self, ant1, ant2):
+        """Return a reference table containing the rows of a baseline."""
+        return self._table.selectrows(self.rownumbers(ant1, ant2))
+
+    def getbaseline(self, ant1, ant2, columns):
+        """Get the data of the given columns for a baseline.
+
+        If `columns` is a single column name, the data are returned as a
+        numpy array. Otherwise a dict containing the data of each column is
+        returned.
+
+        """
+        t = self.selectbaseline(ant1, ant2)
+        if isinstance(columns, str):
+            return t.getcol(columns)
+        return {col: t.getcol(col) for col in columns}
+
+    def rewrite(self, newname, chunkrows=0, nproc=1, progress=False):
+        """Copy the MS in baseline-major order and return the new MS.
+
+        All rows of a baseline are stored contiguously in the new MS,
+        which makes reading per baseline much faster. The arguments
+        `chunkrows`, `nproc` and `progress` are used as in :func:`table.copy`.
+
+        """
+        t = self._table.selectrows(self._rownrs)
+        return t.copy(newname, deep=True, chunkrows=chunkrows, nproc=nproc,
+                      progress=progress)
+
+
+def _antennauvw(times, directions, positions, timeref, dirref):
+    """Compute the uvw of each antenna position for each time/direction."""
+    from casacore.measures import measures
+    from casacore.quanta import quantity
+    dm = measures()
+    dm.do_frame(dm.position('itrf', *[quantity(x, 'm')
+                                      for x in positions[0]]))
+    bl = dm.baseline('itrf', *[quantity(positions[:, i], 'm')
+                               for i in range(3)])
+    result = np.empty((len(times), len(positions), 3))
+    for i in range(len(times)):
+        dm.do_frame(dm.epoch(timeref, quantity(times[i], 's')))
+        dm.do_frame(dm.direction(dirref, quantity(directions[i, 0], 'rad'),
+                                 quantity(directions[i, 1], 'rad')))
+        uvw = dm.to_uvw(bl)['xyz'].get_value()
+        result[i] = np.reshape(uvw, (-1, 3))
+    return result
+
+
+def compute_uvw(ms, column='UVW', nproc=1):
+    """Compute the UVW coordinates of a MeasurementSet.
+
+    The UVW coordinates (in J2000) are calculated from the antenna positions
+    in the ANTENNA subtable and the phase center in the FIELD subtable.
+    The calculation is done for each unique time and field only: the uvw of
+    each antenna is calculated using the measures frame conversions and the
+    uvw of a baseline is derived as the difference of the uvw of its
+    antennas. It is much faster than evaluating the virtual column
+    UVW_J2000 (see :func:`addDerivedMSCal`), which converts each row.
+    The result is written into the given column, which is created (like
+    UVW) if not existing.
+
+    `ms`
+      The MS (a writable :class:`table` object or the name of the MS).
+    `column`
+      The column to write the UVW coordinates into.
+    `nproc`
+      The number of processes used to calculate the UVW coordinates.
+      The conversions are done in Python, so threads would not run them in
+      parallel.
+
+    """
+    if isinstance(ms, str):
+        ms = table(ms, readonly=False, ack=False)
+    uvw = _baselineuvw(ms, nproc)
+    if column not in ms.colnames():
+        ms.addcols(makecoldesc(column, ms.getcoldesc('UVW')))
+    ms.putcol(column, uvw)
+    ms.flush()
+
+
+def _baselineuvw(ms, nproc=1):
+    """Compute the UVW coordinates of each row of an MS."""
+    from concurrent.futures import ProcessPoolExecutor
+    time = ms.getcol('TIME')
+    field = ms.getcol('FIELD_ID')
+    # Find the unique time/field combinations.
+    utime, tinx = np.unique(time, return_inverse=True)
+    keys, first, inverse = np.unique(tinx.ravel() * (field.max() + 1) + field,
+                                     return_index=True, return_inverse=True)
+    tant = table(ms.getkeyword('ANTENNA'), ack=False)
+    positions = tant.getcol('POSITION')
+    tfield = table(ms.getkeyword('FIELD'), ack=False)
+    directions = tfield.getcol('PHASE_DIR')[:, 0, :][field[first]]
+    timeref = ms.getcolkeyword('TIME', 'MEASINFO').get('Ref', 'UTC')
+    dirref = tfield.getcolkeyword('PHASE_DIR', 'MEASINFO').get('Ref', 'J2000')
+    times = time[first]
+    if nproc > 1 and len(times) > 1:
+        parts = np.array_split(np.arange(len(times)), nproc)
+        with ProcessPoolExecutor(nproc) as pool:
+            antuvw = np.concatenate(list(pool.map(
+                _antennauvw, [times[p] for p in parts],
+                [directions[p] for p in parts], [positions] * len(parts),
+                [timeref] * len(parts), [dirref] * len(parts))))
+    else:
+        antuvw = _antennauvw(times, directions, positions, timeref, dirref)
+    inverse = inverse.ravel()
+    return (antuvw[inverse, ms.getcol('ANTENNA2')] -
+            antuvw[inverse, ms.getcol('ANTENNA1')])
+
+
+def materializeDerivedMSCal(msname, columns=None, benchmark=False):
+    """ Store the derived columns like HA in an MS or CalTable.
+
+    The columns HA, HA1, HA2, PA1, PA2, LAST, LAST1, LAST2, AZEL1, AZEL2,
+    and UVW_J2000 (see :func:`addDerivedMSCal`) are virtual columns
+    calculating their value for each row when accessed, although all
+    baselines at the same time share the same antenna based values.
+    This function calculates those values only once per unique time, field,
+    antenna and feed, and replaces the virtual columns by stored columns
+    containing the values of all rows.
+
+    The DerivedMSCal engine is used to calculate the unique values, so the
+    stored values are the same as the values of the virtual columns.
+    UVW_J2000 is calculated per time and antenna as done by
+    :func:`compute_uvw`.
+
+    `columns`
+      The columns to store. By default all of them are stored.
+      The other DerivedMSCal columns are removed.
+    `benchmark`
+      If True, the time needed to get each column from the virtual engine
+      and by this function is printed.
+
+    """
+    import time
+    allcols = ['HA', 'HA1', 'HA2', 'PA1', 'PA2', 'LAST', 'LAST1', 'LAST2',
+               'AZEL1', 'AZEL2', 'UVW_J2000']
+    if columns is None:
+        columns = allcols
+    elif isinstance(columns, str):
+        columns = [columns]
+    for col in columns:
+        if col not in allcols:
+            raise ValueError(col + ' is not a DerivedMSCal column')
+    t = table(msname, readonly=False, ack=False)
+    if 'DerivedMSCal' not in [x['TYPE'] for x in t.getdminfo().values()]:
+        addDerivedMSCal(msname)
+    colnames = t.colnames()
+    # The array based columns depend on time and field; the antenna based
+    # ones also on antenna and feed.
+    tinx = np.unique(t.getcol('TIME'), return_inverse=True)[1].ravel()
+    keys = {'': [tinx, t.getcol('FIELD_ID')]}
+    for suffix in ('1', '2'):
+        if 'ANTENNA' + suffix in colnames:
+            keys[suffix] = keys[''] + [t.getcol('ANTENNA' + suffix)]
+            if 'FEED' + suffix in colnames:
+                keys[suffix].append(t.getcol('FEED' + suffix))
+    values = {}
+    descs = []
+    for col in columns:
+        descs.append(makecoldesc(col, t.getcoldesc(col)))
+        start = time.time()
+        if col == 'UVW_J2000':
+            values[col] = _baselineuvw(t)
+        else:
+            key = np.stack(keys[col[-1] if col[-1] in '12' else ''], axis=1)
+            first, inverse = np.unique(key, axis=0, return_index=True,
+                                       return_inverse=True)[1:]
+            # Only the first row of each unique key is calculated.
+            values[col] = t.selectrows(first).getcol(col)[inverse.ravel()]
+        if benchmark:
+            memotime = time.time() - start
+            start = time.time()
+            t.getcol(col)
+            print('%s: virtual %.3f sec, materialized %.3f sec' %
+                  (col, time.time() - start, memotime))
+    # Replace the virtual columns by stored ones.
+    removeDerivedMSCal(msname)
+    if len(descs) > 0:
+        t.addcols(maketabdesc(descs), {'TYPE': 'StandardStMan',
+                                       'NAME': 'DerivedMSCalStored',
+                                       'SPEC': {}})
+        for col in columns:
+            t.putcol(col, values[col])
+    t.flush()
+
+
+def _flagchunk(flags, groups, flagrow):
+    """Count the flagged data per group and channel in a chunk of rows."""
+    if flagrow is not None:
+        flags = flags | flagrow[:, np.newaxis, np.newaxis]
+    order = np.argsort(groups, kind='stable')
+    groups = groups[order]
+    starts = np.flatnonzero(np.diff(groups, prepend=-1))
+    nrows = np.diff(np.append(starts, len(groups)))
+    return (groups[starts], nrows, flags.shape[2],
+            _groupsum(flags.sum(axis=2)[order], starts))
+
+
+def flagstats(ms, by=['ANTENNA1', 'DATA_DESC_ID', 'FIELD_ID'], chunkrows=0,
+              nthreads=1):
+    """Get the fraction of flagged data in a MeasurementSet.
+
+    The flagged fractions are determined per group and channel, where a
+    group is formed by the unique values of the scalar columns given in
+    `by`. The FLAG column is read once in chunks of rows, which are reduced
+    to counts per group and channel. Rows flagged in FLAG_ROW are counted
+    as entirely flagged.
+
+    `ms`
+      The MS (a :class:`table` object or the name of the MS).
+    `by`
+      The columns defining the groups. An empty list means that the
+      statistics are determined for the entire MS.
+      The groups must contain a single spectral window, so `by` should
+      contain DATA_DESC_ID if the spectral windows differ in number of
+      channels.
+    `chunkrows`
+      The number of rows read at a time. By default chunks of about 64 MB
+      are used.
+    `nthreads`
+      The number of threads used to reduce the chunks. Reading the flags
+      is done in the calling thread, so it overlaps with the reductions.
+
+    A dict is returned containing:
+
+    - `by`: the names of the grouping columns
+    - `keys`: array with the values of the grouping columns for each group
+    - `nrow`: array with the number of rows in each group
+    - `flagged`: list with the number of flagged data per channel for each
+      group (summed over rows and correlations)
+    - `total`: list with the total number of data per channel for each group
+    - `fraction`: array with the overall flagged fraction of each group
+    - `chanfraction`: list with the flagged fraction per channel for each
+      group
+
+    For example::
+
+      stats = flagstats('3c343.MS', by=['ANTENNA1'])
+      for key, frac in zip(stats['keys'], stats['fraction']):
+          print('antenna', key[0], 'flagged', frac)
+
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    if isinstance(ms, str):
+        ms = table(ms, ack=False)
+    if isinstance(by, str):
+        by = [by]
+    nrow = ms.nrows()
+    if len(by) > 0 and nrow > 0:
+        keys = np.stack([ms.getcol(col) for col in by], axis=1)
+        keys, groups = np.unique(keys, axis=0, return_inverse=True)
+        groups = groups.ravel()
+    else:
+        keys = np.zeros((1, len(by)), int)
+        groups = np.zeros(nrow, int)
+    ngroup = len(keys)
+    ddid = ms.getcol('DATA_DESC_ID')
+    flagrow = ms.getcol('FLAG_ROW') if 'FLAG_ROW' in ms.colnames() else None
+    chunkrows = ms.select('FLAG')._chunkrows(chunkrows)
+    nrows = np.zeros(ngroup, int)
+    ncorrs = np.zeros(ngroup, int)
+    flagged = [None] * ngroup
+
+    def accumulate(result):
+        ugroups, unrows, ncorr, counts = result
+        for group, n, count in zip(ugroups, unrows, counts):
+            if flagged[group] is None:
+                flagged[group] = np.zeros(len(count), int)
+                ncorrs[group] = ncorr
+            elif len(count) != len(flagged[group]) or ncorr != ncorrs[group]:
+                raise ValueError('Group ' + str(keys[group]) + ' contains'
+                                 ' data with different shapes; add'
+                                 ' DATA_DESC_ID to argument by')
+            flagged[group] += count
+            nrows[group] += n
+
+    pool = ThreadPoolExecutor(nthreads) if nthreads > 1 else None
+    pending = []
+    for start in range(0, nrow, chunkrows):
+        rows = np.arange(start, min(nrow, start + chunkrows))
+        chunkddid = ddid[rows]
+        uddid = np.unique(chunkddid)
+        for d in uddid:
+            # Rows in different spectral windows can have different shapes.
+            if len(uddid) == 1:
+                flags = ms.getcol('FLAG', start, len(rows))
+                sel = rows
+            else:
+                sel = rows[chunkddid == d]
+                flags = ms.selectrows(sel).getcol('FLAG')
+            args = (flags, groups[sel],
+                    None if flagrow is None else flagrow[sel])
+            if pool is None:
+                accumulate(_flagchunk(*args))
+            else:
+                pending.append(pool.submit(_flagchunk, *args))
+                # Limit the number of chunks held in memory.
+                while len(pending) > nthreads:
+                    accumulate(pending.pop(0).result())
+    for future in pending:
+        accumulate(future.result())
+    if pool is not None:
+        pool.shutdown()
+    total = []
+    chanfraction = []
+    fraction = np.zeros(ngroup)
+    for group in range(ngroup):
+        if flagged[group] is None:
+            flagged[group] = np.zeros(0, int)
+        total.append(np.full(len(flagged[group]),
+                             nrows[group] * ncorrs[group]))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            chanfraction.append(flagged[group] / total[group])
+        if total[group].sum() > 0:
+            fraction[group] = flagged[group].sum() / total[group].sum()
+    return {'by': by, 'keys': keys, 'nrow': nrows, 'flagged': flagged,
+            'total': total, 'fraction': fraction,
+            'chanfraction': chanfraction}
+
+
+def _subtablecols(ms, name, columns):
+    """Read the given columns of an MS subtable (if present) at once."""
+    result = {}
+    if name in ms.getkeywords():
+        sub = table(ms.getkeyword(name), ack=False)
+        if sub.nrows() > 0:
+            for col in columns:
+                if col in sub.colnames():
+                    try:
+                        result[col] = sub.getcol(col)
+                    except Exception:
+                        # Varying shapes (e.g. channels of spectral windows).
+                        result[col] = [sub.getcell(col, i)
+                                       for i in range(sub.nrows())]
+    return result
+
+
+def mssummary(ms):
+    """Get a summary of a MeasurementSet.
+
+    Unlike :func:`tablesummary`, which shows the structure of a table,
+    this function gives a summary of the contents of an MS like CASA's
+    listobs does. The scalar columns TIME, SCAN_NUMBER, FIELD_ID and
+    DATA_DESC_ID of the main table are read once and the unique
+    combinations of their values are found using numpy. The subtables are
+    read column-wise.
+
+    `ms`
+      The MS (a :class:`table` object or the name of the MS).
+
+    A dict is returned containing:
+
+    - `name`: the name of the MS
+    - `nrow`: the number of rows
+    - `timerange`: the first and last time (in MJD seconds)
+    - `telescopes`, `observers`: the values in the OBSERVATION subtable
+    - `scans`: a list of dicts per scan and field giving `scan`,
+      `field`, `ddids`, `start`, `end` and `nrow`
+    - `fields`: a list of dicts per field giving `id`, `name`, `code`,
+      `direction` (phase center in radians) and `nrow`
+    - `spws`: a list of dicts per data description giving `ddid`, `spw`,
+      `polarization`, `name`, `nchan`, `reffreq`, `bandwidth`,
+      `corrtypes` and `nrow`
+    - `antennas`: a list of the antenna names
+
+    For example::
+
+      summ = mssummary('3c343.MS')
+      for scan in summ['scans']:
+          print(scan['scan'], scan['field'], scan['end'] - scan['start'])
+
+    """
+    if isinstance(ms, str):
+        ms = table(ms, ack=False)
+    nrow = ms.nrows()
+    time = ms.getcol('TIME') if nrow > 0 else np.zeros(0)
+    cols = [ms.getcol(col).astype(np.int64) if nrow > 0 else
+            np.zeros(0, np.int64)
+            for col in ('SCAN_NUMBER', 'FIELD_ID', 'DATA_DESC_ID')]
+    # Combine the values into a single key to find the unique combinations.
+    mins = [col.min() if nrow > 0 else 0 for col in cols]
+    sizes = [col.max() - vmin + 1 if nrow > 0 else 1
+             for col, vmin in zip(cols, mins)]
+    key = ((cols[0] - mins[0]) * sizes[1] + cols[1] - mins[1]) * sizes[2] + \
+        cols[2] - mins[2]
+    ukey, inverse = np.unique(key, return_inverse=True)
+    inverse = inverse.ravel()
+    order = np.argsort(inverse, kind='stable')
+    starts = np.flatnonzero(np.diff(inverse[order], prepend=-1))
+    first = order[starts]
+    sortedtime = time[order]
+    start = np.minimum.reduceat(sortedtime, starts) if nrow > 0 else time
+    end = np.maximum.reduceat(sortedtime, starts) if nrow > 0 else time
+    counts = np.bincount(inverse, minlength=len(ukey))
+    scan = cols[0][first]
+    field = cols[1][first]
+    ddid = cols[2][first]
+    # Merge the data descriptions per scan and field.
+    scans = []
+    for i in range(len(ukey)):
+        if i > 0 and scan[i] == scan[i-1] and field[i] == field[i-1]:
+            summ = scans[-1]
+            summ['ddids'].append(int(ddid[i]))
+            summ['start'] = min(summ['start'], float(start[i]))
+            summ['end'] = max(summ['end'], float(end[i]))
+            summ['nrow'] += int(counts[i])
+        else:
+            scans.append({'scan': int(scan[i]), 'field': int(field[i]),
+                          'ddids': [int(ddid[i])], 'start': float(start[i]),
+                          'end': float(end[i]), 'nrow': int(counts[i])})
+    # Count the rows per id (ids can be -1 for rows without a valid id).
+    fieldrows = dict(zip(*[x.tolist() for x in
+                           np.unique(cols[1], return_counts=True)]))
+    ddidrows = dict(zip(*[x.tolist() for x in
+                          np.unique(cols[2], return_counts=True)]))
+    sub = _subtablecols(ms, 'FIELD', ['NAME', 'CODE', 'PHASE_DIR'])
+    fields = []
+    for i in range(len(sub.get('NAME', []))):
+        fields.append({'id': i, 'name': sub['NAME'][i],
+                       'code': sub['CODE'][i] if 'CODE' in sub else '',
+                       'direction': np.asarray(sub['PHASE_DIR'][i])[0],
+                       'nrow': fieldrows.get(i, 0)})
+    spw = _subtablecols(ms, 'SPECTRAL_WINDOW',
+                        ['NAME', 'NUM_CHAN', 'REF_FREQUENCY',
+                         'TOTAL_BANDWIDTH'])
+    pol = _subtablecols(ms, 'POLARIZATION', ['CORR_TYPE'])
+    dd = _subtablecols(ms, 'DATA_DESCRIPTION',
+                       ['SPECTRAL_WINDOW_ID', 'POLARIZATION_ID'])
+    spws = []
+    for i in range(len(dd.get('SPECTRAL_WINDOW_ID', []))):
+        spwid = int(dd['SPECTRAL_WINDOW_ID'][i])
+        polid = int(dd['POLARIZATION_ID'][i])
+        summ = {'ddid': i, 'spw': spwid, 'polarization': polid,
+                'nrow': ddidrows.get(i, 0)}
+        if 0 <= spwid < len(spw.get('NUM_CHAN', [])):
+            summ.update({'name': spw['NAME'][spwid],
+                         'nchan': int(spw['NUM_CHAN'][spwid]),
+                         'reffreq': float(spw['REF_FREQUENCY'][spwid]),
+                         'bandwidth': float(spw['TOTAL_BANDWIDTH'][spwid])})
+        if 0 <= polid < len(pol.get('CORR_TYPE', [])):
+            summ['corrtypes'] = [int(x) for x in pol['CORR_TYPE'][polid]]
+        spws.append(summ)
+    obs = _subtablecols(ms, 'OBSERVATION', ['TELESCOPE_NAME', 'OBSERVER'])
+    ant = _subtablecols(ms, 'ANTENNA', ['NAME'])
+    return {'name': ms.name(), 'nrow': nrow,
+            'timerange': ([float(time.min()), float(time.max())]
+                          if nrow > 0 else []),
+            'telescopes': list(obs.get('TELESCOPE_NAME', [])),
+            'observers': list(obs.get('OBSERVER', [])),
+            'scans': scans, 'fields': fields, 'spws': spws,
+            'antennas': list(ant.get('NAME', []))}
+
+
+def _xarraychunk(selection, columnname, rowgrid, cellshape, dtype):
+    """Read the cells of a (time, baseline) grid of rows (see to_xarray).
+
+    Missing rows (-1) are filled with NaN, True for booleans, and -1 for
+    integers.
+
+    """
+    rows = rowgrid.ravel()
+    valid = np.flatnonzero(rows >= 0)
+    fill = {'b': True, 'f': np.nan, 'c': np.nan}.get(np.dtype(dtype).kind, -1)
+    data = np.full((len(rows),) + tuple(cellshape), fill, dtype=dtype)
+    if len(valid) > 0:
+        # Read the rows in storage order.
+        order = np.argsort(rows[valid], kind='stable')
+        t = selection.open().selectrows(rows[valid][order])
+        data[valid[order]] = t.getcol(columnname)
+    return data.reshape(rowgrid.shape + tuple(cellshape))
+
+
+def to_xarray(ms, columns, partition_by=['FIELD_ID', 'DATA_DESC_ID'],
+              timechunk=0):
+    """Get columns of a MeasurementSet as lazily loaded xarray Datasets.
+
+    The rows of an MS form an irregular set of times and baselines. This
+    function reads the columns TIME, ANTENNA1, ANTENNA2 and the
+    `partition_by` columns once to make an index giving the row number of
+    each (time, baseline) in each partition. The data are only read when
+    (part of) a variable is loaded; each chunk is read by reopening the MS
+    (using a :class:`tableselection`), so a Dataset can be used with any
+    dask scheduler. Both xarray and dask have to be installed.
+
+    `ms`
+      The MS (a :class:`table` object or the name of the MS).
+    `columns`
+      The name or a list of names of the columns to get. Within a partition
+      a column must contain scalars or arrays with the same shape.
+    `partition_by`
+      The columns defining the partitions. A Dataset is made for each
+      unique combination of their values. By default a Dataset contains a
+      single field and spectral window, thus the cells have the same shape.
+    `timechunk`
+      The number of times per dask chunk. By default a chunk contains
+      about 64 MB of the largest column.
+
+    A list of Datasets is returned. The partition values are the attributes
+    of a Dataset. The dimensions are `time` and `baseline` followed by
+    `chan` and `corr` for a column like DATA, `corr` for WEIGHT and SIGMA,
+    and `uvw` for UVW. The baselines have the coordinates `antenna1` and
+    `antenna2`. If DATA_DESC_ID is one of the partition columns, `chan`
+    has the coordinate `frequency` taken from the SPECTRAL_WINDOW
+    subtable. A time/baseline missing in the MS is filled with NaN
+    (True for booleans and -1 for integers). If a time/baseline occurs
+    multiple times in a partition, the last row is used. An empty MS gives
+    no Datasets (or a single empty Dataset if `partition_by` is empty).
+
+    For example::
+
+      for ds in to_xarray('3c343.MS', ['DATA', 'FLAG']):
+          amp = abs(ds.DATA).where(~ds.FLAG).mean('time').compute()
+
+    """
+    import xarray
+    import dask.array as da
+    from dask.base import tokenize
+    from casacore.tables.tableselection import tableselection
+    from .tablehelper import _coldtype
+    if isinstance(ms, str):
+        ms = table(ms, ack=False)
+    if isinstance(columns, str):
+        columns = [columns]
+    selection = tableselection(ms)
+    time = ms.getcol('TIME')
+    ant1 = ms.getcol('ANTENNA1').astype(np.int64)
+    ant2 = ms.getcol('ANTENNA2').astype(np.int64)
+    nant = max(ant1.max(initial=0), ant2.max(initial=0)) + 1
+    if len(partition_by) > 0:
+        keys = np.stack([ms.getcol(col).astype(np.int64)
+                         for col in partition_by], 1)
+        ukeys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+    else:
+        ukeys = np.zeros((1, 0), np.int64)
+        inverse = np.zeros(len(time), np.int64)
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.searchsorted(inverse[order], np.arange(len(ukeys) + 1))
+    freqs = None
+    if 'DATA_DESC_ID' in partition_by:
+        dd = _subtablecols(ms, 'DATA_DESCRIPTION', ['SPECTRAL_WINDOW_ID'])
+        spw = _subtablecols(ms, 'SPECTRAL_WINDOW', ['CHAN_FREQ'])
+        if 'SPECTRAL_WINDOW_ID' in dd and 'CHAN_FREQ' in spw:
+            freqs = [np.asarray(spw['CHAN_FREQ'][i])
+                     for i in dd['SPECTRAL_WINDOW_ID']]
+    datasets = []
+    for part, key in enumerate(ukeys):
+        rows = order[bounds[part]:bounds[part + 1]]
+        utime, timeinx = np.unique(time[rows], return_inverse=True)
+        ubl, blinx = np.unique(ant1[rows] * nant + ant2[rows],
+                               return_inverse=True)
+        rowgrid = np.full((len(utime), len(ubl)), -1, np.int64)
+        rowgrid[timeinx.ravel(), blinx.ravel()] = rows
+        cells = {}
+        for col in columns:
+            coldesc = ms.getcoldesc(col)
+            cellshape = ()
+            if not ms.isscalarcol(col):
+                if len(rows) > 0:
+                    cellshape = ms.getcolshapes(col, int(rows[0]), 1)[0]
+                else:
+                    cellshape = coldesc.get(
+                        'shape', [0] * max(0, coldesc.get('ndim', 0)))
+                cellshape = tuple(int(n) for n in cellshape)
+            cells[col] = (cellshape, _coldtype(coldesc))
+        ntime = timechunk
+        if ntime <= 0:
+            rowbytes = max([int(np.prod(shape)) * dtype.itemsize
+                            for shape, dtype in cells.values()] + [1])
+            timebytes = rowbytes * max(1, len(ubl))
+            ntime = max(1, 64 * 1024 * 1024 // timebytes)
+        # An empty partition still gets an (empty) chunk.
+        starts = range(0, max(1, len(utime)), ntime)
+        variables = {}
+        for col, (cellshape, dtype) in cells.items():
+            if len(cellshape) == 2:
+                dims = ('chan', 'corr')
+            elif len(cellshape) == 1:
+                dims = ('uvw',) if col == 'UVW' else ('corr',)
+            else:
+                dims = tuple(col.lower() + '_' + str(i)
+                             for i in range(len(cellshape)))
+            name = 'casacore-' + col + '-' + tokenize(
+                selection, col, rowgrid, ntime)
+            dsk = {(name, i, 0) + (0,) * len(cellshape):
+                   (_xarraychunk, selection, col, rowgrid[start:start+ntime],
+                    cellshape, dtype)
+                   for i, start in enumerate(starts)}
+            chunks = ((tuple(min(ntime, len(utime) - s) for s in starts),) +
+                      ((len(ubl),),) + tuple((n,) for n in cellshape))
+            variables[col] = (('time', 'baseline') + dims,
+                              da.Array(dsk, name, chunks, dtype=dtype))
+        coords = {'time': utime, 'antenna1': ('baseline', ubl // nant),
+                  'antenna2': ('baseline', ubl % nant)}
+        attrs = {col: int(k) for col, k in zip(partition_by, key)}
+        chans = [v[1].shape[2] for v in variables.values()
+                 if v[0][2:3] == ('chan',)]
+        if (freqs is not None and len(chans) > 0 and
+                0 <= attrs['DATA_DESC_ID'] < len(freqs) and
+                len(freqs[attrs['DATA_DESC_ID']]) == chans[0]):
+            coords['frequency'] = ('chan', freqs[attrs['DATA_DESC_ID']])
+        datasets.append(xarray.Dataset(variables, coords=coords,
+                                       attrs=attrs))
+    return datasets
@@ -36,6 +36,8 @@ Several utility functions exist. Important ones are:
 
 """
 
+import numpy
+
 from ._tables import (Table,
                       _default_ms,
                       _default_ms_subtable,
@@ -43,7 +45,7 @@ from ._tables import (Table,
                       _complete_ms_desc)
 
 from .tablehelper import (_add_prefix, _remove_prefix, _do_remove_prefix,
-                          _format_row)
+                          _format_row, _coldtype)
 
 def default_ms(name, tabdesc=None, dminfo=None):
     """
@@ -161,6 +163,118 @@ def taql(command, style='Python', tables=[], globals={}, locals={}):
 tablecommand = taql
 
 
+# The transforms that can be done when getting a column.
+_transforms = {None: lambda x: x, 'amp': numpy.abs, 'phase': numpy.angle,
+               'real': numpy.real, 'imag': numpy.imag}
+
+
+# The numpy types of the column data types which can be read directly into
+# an array (other integer types such as int64 cannot).
+_getintotypes = {'boolean': numpy.bool_, 'int': numpy.int32,
+                 'float': numpy.float32, 'double': numpy.float64,
+                 'complex': numpy.complex64, 'dcomplex': numpy.complex128}
+
+
+def _getinto(out, datatype, getnp, get):
+    """Get data into out; directly if it is contiguous, otherwise copied.
+
+    The data are only read directly if out has the numpy type of the
+    column's data type.
+
+    """
+    if (out.flags.c_contiguous and out.size > 0 and
+            out.dtype == _getintotypes.get(datatype)):
+        getnp(out)
+    else:
+        out[...] = get()
+    return out
+
+
+def _csvformat(values, sep):
+    """Format the column values of a chunk of rows as CSV lines."""
+    columns = []
+    for value in values:
+        value = numpy.asarray(value)
+        value = value.reshape(len(value), -1)
+        if value.dtype.kind == 'c':
+            value = numpy.stack([value.real, value.imag],
+                                axis=2).reshape(len(value), -1)
+        if value.dtype.kind in 'US':
+            value = numpy.char.add(numpy.char.add(
+                '"', numpy.char.replace(value.astype(str), '"', '""')), '"')
+        elif value.dtype == numpy.float32:
+            # Python floats would show the float64 rounding errors.
+            value = value.astype(str)
+        columns += [value[:, i].tolist() for i in range(value.shape[1])]
+    if len(columns) == 0:
+        return ''
+    # Formatting Python scalars row-wise is faster than numpy's astype(str).
+    fmt = sep.join(['%s'] * len(columns)) + '\n'
+    return ''.join([fmt % row for row in zip(*columns)])
+
+
+def _raggedblocks(offsets, rows, size, maxindex=1048576):
+    """Yield blocks of cells having the same size in a ragged array.
+
+    It yields (start, end, index) where start:end is the range in `rows`
+    and index tells where their values are. It is a slice if the values
+    of the cells are contiguous; otherwise an index array of at most
+    `maxindex` elements is used.
+
+    """
+    starts = offsets[rows]
+    nrow = len(rows)
+    breaks = list(numpy.flatnonzero(numpy.diff(starts) != size) + 1)
+    if len(breaks) <= nrow // 16:
+        for st, end in zip([0] + breaks, breaks + [nrow]):
+            yield st, end, slice(starts[st], starts[st] + (end - st) * size)
+    else:
+        step = max(1, maxindex // size)
+        for st in range(0, nrow, step):
+            end = min(nrow, st + step)
+            yield st, end, (starts[st:end, numpy.newaxis] +
+                            numpy.arange(size)).ravel()
+
+
+def _copyrowsworker(intablename, outtablename, chunkrows):
+    """Copy all rows of a table to an empty table (run in a worker)."""
+    tin = table(intablename, ack=False)
+    tout = table(outtablename, readonly=False, ack=False)
+    chunkrows = tin._chunkrows(chunkrows)
+    for startrow in range(0, tin.nrows(), chunkrows):
+        tin.copyrows(tout, startrow, -1, chunkrows)
+    tout.flush()
+    return outtablename
+
+
+def _daskcolumnchunk(selection, columnname, cellshape, blc, trc):
+    """Read a chunk of a column for a dask array (see table.to_dask)."""
+    t = selection.open()
+    nrow = trc[0] - blc[0] + 1
+    if blc[1:] == [0] * len(cellshape) and trc[1:] == [n - 1 for n
+                                                       in cellshape]:
+        return numpy.asarray(t.getcol(columnname, blc[0], nrow))
+    return t.getcolslice(columnname, blc[1:], trc[1:], [], blc[0], nrow)
+
+
+def _subtablepairs(tin, tout, pairs):
+    """Add (inname, outname, nrow) of the non-empty subtables to be copied.
+
+    Subtables of subtables are added as well.
+
+    """
+    from .tablehelper import _remove_prefix
+    for name, val in tin.getkeywords().items():
+        if (not isinstance(val, str) or val.find('Table: ') != 0 or
+                name not in tout.keywordnames()):
+            continue
+        subin = table(_remove_prefix(val), ack=False)
+        subout = table(_remove_prefix(tout.getkeyword(name)), ack=False)
+        if subin.nrows() > 0 and subout.nrows() == 0:
+            pairs.append((subin.name(), subout.name(), subin.nrows()))
+        _subtablepairs(subin, subout, pairs)
+
+
 class table(Table):
     """The Python interface to Casacore tables.
 
@@ -309,6 +423,9 @@ class table(Table):
 
     """
 
+    # The optional cache of cell values (see setcellcache).
+    _cellcache = None
+
     def __init__(self, tablename, tabledesc=False, nrow=0, readonly=True,
                  lockoptions='default', ack=True, dminfo={}, endian='aipsrc',
                  memorytable=False, concatsubtables=[],
@@ -402,10 +519,24 @@ class table(Table):
         """Function to exit a with block which closes the table object."""
         self.close()
 
+    def __reduce__(self):
+        """Make it possible to pickle a table object.
+
+        The table is pickled as a :class:`tableselection`, i.e. as the name
+        of its parent table, the selected row numbers, and column names.
+        Unpickling reopens the parent table and selects the rows and
+        columns again, so a reference table can be passed to other
+        processes without executing its query again.
+
+        """
+        from .tableselection import tableselection, _opentable
+        return (_opentable, (tableselection(self),))
+
     def _makerow(self):
         """Internal method to make its tablerow object."""
         from .tablerow import _tablerow
         self._row = _tablerow(self, [])
+        self._row._cache = self._cellcache
 
     def __str__(self):
         """Return the table name and the basic statistics"""
@@ -467,6 +598,15 @@ class table(Table):
         """Put value into one or more rows."""
         self._row._setitem(key, value, self.nrows())
 
+    def _cellcachechanged(self):
+        """Tell if the data changed (used by the cell cache on a hit)."""
+        return self._datachanged()
+
+    def _clearcellcache(self, columnname=None):
+        """Remove the cached cells of a column or of all columns."""
+        if self._cellcache is not None:
+            self._cellcache.clear(columnname)
+
     def col(self, columnname):
         """Return a tablecolumn object for the given column.
 
@@ -568,6 +708,7 @@ class table(Table):
     def close(self):
         """Flush and close the table which invalidates the table object."""
         self._row = 0
+        self._cellcache = None
         self._close()
 
     def done(self):
@@ -621,6 +762,116 @@ class table(Table):
         if len(msg) > 0:
             print(msg)
 
+    def tocsv(self, path, columns=[], chunkrows=0, nproc=1,
+              compression=None, sep=',', header=True):
+        """Write the table in CSV format.
+
+        Unlike :func:`toascii`, which gets and formats each cell separately,
+        the columns are read in chunks of rows. The values of a chunk are
+        converted to Python scalars at once and formatted row by row.
+        It is meant to export large tables to other tools.
+
+        `path`
+          The name of the resulting CSV file.
+        `columns`
+          The names of the columns to be written. By default all columns
+          are written.
+        `chunkrows`
+          The number of rows read and formatted at a time. By default chunks
+          of about 64 MB are used.
+        `nproc`
+          The number of processes formatting the chunks. The formatting is
+          done in Python, so threads would not run in parallel. The chunks
+          are read in the calling process (overlapping with the formatting)
+          and written sequentially in row order.
+        `compression`
+          None (default), 'gzip' or 'zstd'. For zstd the module
+          `compression.zstd` (Python 3.14) or `zstandard` is needed.
+        `sep`
+          The separator between values. Use '\\t' for TSV.
+        `header`
+          If True, the first line contains the names of the values.
+
+        An array column is written as a value per array element, named like
+        DATA_1_0 (using the C-order index). Complex values are written as
+        real and imaginary part named like DATA_re and DATA_im. Strings are
+        enclosed in double quotes. Columns containing records or arrays
+        with varying shapes are ignored; it is told which columns.
+
+        For example::
+
+          t = table('3c343.MS')
+          t.tocsv('3c343.csv.gz', ['TIME', 'ANTENNA1', 'ANTENNA2', 'UVW'],
+                  compression='gzip')
+
+        """
+        import io
+        from concurrent.futures import ProcessPoolExecutor
+        if isinstance(columns, str):
+            columns = [columns]
+        if len(columns) == 0:
+            columns = self.colnames()
+        nrow = self.nrows()
+        names = []
+        usecols = []
+        for col in columns:
+            ignore = self.coldatatype(col) == 'record'
+            if not ignore and self.isvarcol(col):
+                try:
+                    ignore = len(set(self.getcolshapestring(col))) != 1
+                except RuntimeError:
+                    # Some cells are undefined.
+                    ignore = True
+            if ignore:
+                print('Column', col, 'ignored; it contains records or '
+                      'arrays with varying shapes')
+                continue
+            usecols.append(col)
+            shape = ()
+            if not self.isscalarcol(col) and nrow > 0:
+                shape = self.getcell(col, 0).shape
+            suffixes = [''.join(['_' + str(i) for i in index])
+                        for index in numpy.ndindex(*shape)]
+            if self.coldatatype(col) in ('complex', 'dcomplex'):
+                suffixes = [x + y for x in suffixes for y in ('_re', '_im')]
+            names += [col + x for x in suffixes]
+        if compression == 'gzip':
+            import gzip
+            f = gzip.open(path, 'wt', compresslevel=6)
+        elif compression == 'zstd':
+            try:
+                from compression import zstd
+                f = zstd.open(path, 'wt')
+            except ImportError:
+                import zstandard
+                f = io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(
+                    open(path, 'wb')), encoding='utf-8')
+        elif compression is None:
+            f = open(path, 'w')
+        else:
+            raise ValueError('Unknown compression ' + str(compression))
+        chunkrows = self.select(','.join(usecols))._chunkrows(chunkrows) \
+            if len(usecols) > 0 else max(1, nrow)
+        pool = ProcessPoolExecutor(nproc) if nproc > 1 else None
+        with f:
+            if header:
+                f.write(sep.join(names) + '\n')
+            pending = []
+            for startrow in range(0, nrow, chunkrows):
+                n = min(chunkrows, nrow - startrow)
+                values = [self.getcol(col, startrow, n) for col in usecols]
+                if pool is None:
+                    f.write(_csvformat(values, sep))
+                    continue
+                pending.append(pool.submit(_csvformat, values, sep))
+                # Limit the number of chunks held in memory.
+                while len(pending) > nproc:
+                    f.write(pending.pop(0).result())
+            for future in pending:
+                f.write(future.result())
+        if pool is not None:
+            pool.shutdown()
+
     def rename(self, newtablename):
         """Rename the table.
 
@@ -631,7 +882,8 @@ class table(Table):
         self._rename(newtablename)
 
     def copy(self, newtablename, deep=False, valuecopy=False, dminfo={},
-             endian='aipsrc', memorytable=False, copynorows=False):
+             endian='aipsrc', memorytable=False, copynorows=False,
+             chunkrows=0, nproc=1, progress=False):
         """Copy the table and return a table object for the copy.
 
         It copies all data in the columns and keywords.
@@ -660,19 +912,116 @@ class table(Table):
         `copynorows=True`
           only copy the column layout and keywords, but no data.
 
+        A deep copy is normally done by the table system in a single pass.
+        For large tables (e.g. a MeasurementSet) the following arguments
+        can be used to copy in chunks of rows and to copy the subtables
+        in parallel with the main table.
+
+        `chunkrows`
+          the number of rows copied at a time. If 0 (the default), a chunk
+          of about 64 MB is used if one of the other arguments is given.
+        `nproc`
+          the number of processes used to copy the subtables concurrently
+          with the main table. Note that the columns of a single table are
+          not written in parallel, because a table has only one writer.
+        `progress`
+          True means that the progress is printed. It can also be a function
+          which is called as ``progress(tablename, nrowdone, nrow)``.
+
+        When one of these arguments is used, `copynorows=True` only leaves
+        the main table empty, while the subtables are copied. The returned
+        table is writable, so it can be filled thereafter using
+        :func:`copyrows` (e.g. from a selection of this table) to do a
+        partial copy.
+
         For example::
 
           t  = table('3c343.MS')
           t1 = t.query('ANTENNA1 != ANTENNA2')   # do row selection
           t2 = t1.copy ('3c343.sel', True)       # make deep copy
           t2 = t.copy ('new.tab', True, True)    # reorganize storage
+          t2 = t.copy ('new.tab', True, True, nproc=4, progress=True)
 
         """
+        if (deep or valuecopy) and not memorytable and (
+                chunkrows > 0 or nproc > 1 or progress):
+            return self._chunkedcopy(newtablename, valuecopy, dminfo, endian,
+                                     copynorows, chunkrows, nproc, progress)
         t = self._copy(newtablename, memorytable, deep, valuecopy,
                        endian, dminfo, copynorows)
         # copy returns a Table object, so turn that into table.
         return table(t, _oper=3)
 
+    def _chunkedcopy(self, newtablename, valuecopy, dminfo, endian,
+                     copynorows, chunkrows, nproc, progress):
+        """Make a deep copy in chunks of rows (see :func:`copy`)."""
+        from concurrent.futures import ProcessPoolExecutor
+        if progress is True:
+            def progress(name, nrowdone, nrow):
+                print('Copied %d of %d rows of %s' % (nrowdone, nrow, name))
+        # Create the (empty) copy including its (empty) subtables.
+        tout = table(self._copy(newtablename, False, True, valuecopy,
+                                endian, dminfo, True), _oper=3)
+        newtablename = tout.name()
+        tout.close()
+        tout = table(newtablename, readonly=False, ack=False)
+        subtables = []
+        _subtablepairs(self, tout, subtables)
+        # The subtables are copied by worker processes, while this process
+        # copies the main table.
+        pool = None
+        futures = []
+        if len(subtables) > 0:
+            if nproc > 1:
+                pool = ProcessPoolExecutor(nproc - 1)
+            for inname, outname, nrow in subtables:
+                if pool is None:
+                    _copyrowsworker(inname, outname, chunkrows)
+                    if progress:
+                        progress(outname, nrow, nrow)
+                else:
+                    futures.append((pool.submit(_copyrowsworker, inname,
+                                                outname, chunkrows), nrow))
+        if not copynorows:
+            # Add all rows at once, so storage managers can allocate them.
+            nrow = self.nrows()
+            tout.addrows(nrow)
+            chunkrows = self._chunkrows(chunkrows)
+            for startrow in range(0, nrow, chunkrows):
+                n = min(chunkrows, nrow - startrow)
+                self._copyrows(tout, startrow, startrow, n)
+                if progress:
+                    progress(tout.name(), startrow + n, nrow)
+        for future, nrow in futures:
+            outname = future.result()
+            if progress:
+                progress(outname, nrow, nrow)
+        if pool is not None:
+            pool.shutdown()
+        if copynorows:
+            return tout
+        tout.close()
+        return table(newtablename, ack=False)
+
+    def _chunkrows(self, chunkrows, nbytes=64*1024*1024):
+        """Return the given chunk size or the number of rows in nbytes."""
+        if chunkrows > 0:
+            return chunkrows
+        rowsize = 0
+        if self.nrows() > 0:
+            for col in self.colnames():
+                try:
+                    val = self._getcell(col, 0)
+                except Exception:
+                    continue
+                if isinstance(val, numpy.ndarray):
+                    rowsize += val.nbytes
+                elif isinstance(val, str):
+                    rowsize += len(val)
+                else:
+                    rowsize += 8
+        return max(1, nbytes // max(1, rowsize))
+
     def copyrows(self, outtable, startrowin=0, startrowout=-1, nrow=-1):
         """Copy the contents of rows from this table to outtable.
 
@@ -698,6 +1047,7 @@ class table(Table):
 
         """
         self._copyrows(outtable, startrowin, startrowout, nrow)
+        outtable._clearcellcache()
 
     def iswritable(self):
         """Return if the table is writable."""
@@ -756,7 +1106,14 @@ class table(Table):
     def datachanged(self):
         """Tell if data in the table have changed since the last time
         called."""
-        return self._datachanged()
+        changed = self._datachanged()
+        cache = self._cellcache
+        if cache is not None:
+            if changed:
+                cache.clear()
+            changed = changed or cache.datachanged
+            cache.datachanged = False
+        return changed
 
     def ismultiused(self, checksubtables=False):
         """Tell if the table is used in other processes.
@@ -811,6 +1168,116 @@ class table(Table):
         """
         self._setmaxcachesize(columnname, nbytes)
 
+    def tunecachesize(self, columnname, access='row', blc=[], trc=[],
+                      nbaseline=0, limit=1024*1024*1024, setcache=True):
+        """Set the cache size of a tiled column for the given access pattern.
+
+        The optimal cache size of a column stored with a tiled storage
+        manager depends on the tile shape and the way the column is accessed.
+        If the cache is too small, tiles are read over and over again.
+        This method derives the cache size from the tile shapes given by
+        :func:`getdminfo` and sets it using :func:`setmaxcachesize`.
+
+        `access` tells the access pattern:
+
+        'row'
+          All rows are read in row order (e.g. by iterating over the rows or
+          by getting the column in chunks of rows). Only the cell slice given
+          by `blc` and `trc` is read (by default the full cell).
+        'channel'
+          The cells are read in consecutive slices of the shape given by
+          `blc` and `trc` (e.g. a range of channels) and for each slice all
+          rows are read (e.g. using :func:`getcolslice`).
+        'baseline'
+          The rows are read per baseline (e.g. using a :class:`tableiter`
+          on ANTENNA1,ANTENNA2). `nbaseline` gives the number of baselines;
+          if 0, it is determined from the ANTENNA1 and ANTENNA2 columns.
+
+        As for :func:`getcolslice`, `blc` and `trc` are given in C order.
+        The cache size will not exceed `limit` bytes.
+        `setcache=False` only calculates the cache size without setting it.
+
+        A dict is returned containing the cache size in bytes ('cachesize'),
+        the expected number of tiles read for the access pattern
+        ('tilesread') and the number of bytes read ('bytesread').
+        A column not stored with a tiled storage manager gives cache size 0.
+
+        For example::
+
+          t = table('3c343.MS')
+          t.tunecachesize('DATA', 'channel', blc=[0,0], trc=[7,3])
+          for st in range(0, nchan, 8):
+              data = t.getcolslice('DATA', [st,0], [st+7,3])
+
+        """
+        from .tablehelper import _tiledcubes, _tileaccess
+        cubes = _tiledcubes(self.getdminfo(columnname))
+        if access == 'baseline' and nbaseline <= 0:
+            if not ('ANTENNA1' in self.colnames() and
+                    'ANTENNA2' in self.colnames()):
+                raise ValueError("nbaseline must be given for table " +
+                                 self.name())
+            bl = self.getcol('ANTENNA1') * 65536 + self.getcol('ANTENNA2')
+            nbaseline = len(numpy.unique(bl))
+        cachesize = 0
+        tilesread = 0
+        bytesread = 0
+        for cubeshape, tileshape, bucketsize in cubes:
+            size, ntiles = _tileaccess(cubeshape, tileshape, bucketsize,
+                                       access, blc, trc, nbaseline, limit)
+            cachesize = max(cachesize, size)
+            tilesread += ntiles
+            bytesread += ntiles * bucketsize
+        if setcache and cachesize > 0:
+            self._setmaxcachesize(columnname, cachesize)
+        return {'cachesize': cachesize,
+                'tilesread': tilesread,
+                'bytesread': bytesread}
+
+    def setcellcache(self, nbytes):
+        """Enable or disable the cache of cell values.
+
+        Interactive tools often get the same cells over and over again
+        (e.g. :func:`getcell` or a :class:`tablerow`). By default each such
+        access reads and decodes the cell again. This method enables an LRU
+        cache of decoded cell values (and rows) holding at most `nbytes`
+        bytes. A value <= 0 disables the cache.
+
+        The cached values are invalidated by puts done through this table
+        object (only the cells written) and if :func:`datachanged` tells the
+        data have changed (e.g. by another process), which is checked on
+        each cache hit. Changes made via another table object (e.g. a
+        selection of this table) are not noticed.
+
+        An array returned from the cache is a copy of the cached array, so
+        it can be changed without affecting the cache.
+
+        Statistics of the cache can be obtained with :func:`cellcachestats`.
+
+        """
+        import weakref
+        from .tablehelper import _cellcache
+        if nbytes <= 0:
+            self._cellcache = None
+        else:
+            self._cellcache = _cellcache(
+                nbytes, weakref.WeakMethod(self._cellcachechanged))
+        self._row._cache = self._cellcache
+
+    def cellcachestats(self):
+        """Get the statistics of the cell cache.
+
+        It returns a dict containing the number of cache hits and misses,
+        the number of cached cells and rows, their total size in bytes, and
+        the maximum size of the cache.
+        An empty dict is returned if no cache is used (see
+        :func:`setcellcache`).
+
+        """
+        if self._cellcache is None:
+            return {}
+        return self._cellcache.stats()
+
     def rownumbers(self, table=None):
         """Return a list containing the row numbers of this table.
 
@@ -912,6 +1379,7 @@ class table(Table):
 
         """
         self._removerows(rownrs)
+        self._clearcellcache()
 
     def getcolshapestring(self, columnname,
                           startrow=0, nrow=-1, rowincr=1):
@@ -930,6 +1398,83 @@ class table(Table):
                                        startrow, nrow, rowincr,
                                        True)   # reverse axes
 
+    def getcolshapes(self, columnname, startrow=0, nrow=-1, rowincr=1):
+        """Get the shapes of all cells in the column as an integer array.
+
+        It is similar to :func:`getcolshapestring`, but returns an integer
+        array with shape (nrow, ndim) giving the shape of each cell.
+        The shape of an undefined cell consists of zeros.
+
+        The column can be sliced by giving a start row (default 0), number of
+        rows (default all), and row stride (default 1).
+
+        """
+        if nrow < 0:
+            nrow = (self.nrows() - startrow + rowincr - 1) // rowincr
+        tsel = self
+        if rowincr != 1:
+            # getcolshapestring only fills part of the shapes if rowincr > 1.
+            tsel = self.selectrows(numpy.arange(startrow,
+                                                startrow + nrow * rowincr,
+                                                rowincr))
+            startrow = 0
+        definx = slice(None)
+        try:
+            strings = tsel.getcolshapestring(columnname, startrow, nrow)
+            ndef = nrow
+        except RuntimeError:
+            if self.isscalarcol(columnname):
+                raise
+            # Some cells are undefined; get the shapes of the others.
+            if startrow != 0 or nrow != tsel.nrows():
+                tsel = tsel.selectrows(numpy.arange(startrow,
+                                                    startrow + nrow))
+            tdef = tsel.query('isdefined(' + columnname + ')',
+                              columns=columnname)
+            definx = numpy.array(tdef.rownumbers(tsel), dtype=int)
+            ndef = len(definx)
+            strings = []
+            if ndef > 0:
+                strings = tdef.getcolshapestring(columnname)
+        if len(strings) == 1 and ndef > 1:
+            strings = strings * ndef
+        ndim = max([s.count(',') + 1 for s in strings] +
+                   [self.getcoldesc(columnname).get('ndim', 0)])
+        if nrow == 0 or ndim <= 0:
+            return numpy.zeros((nrow, max(0, ndim)), int)
+        shapes = numpy.zeros((nrow, ndim), int)
+        if ndef > 0:
+            values = numpy.array(','.join([s[1:-1] for s in strings])
+                                 .split(','), dtype=int)
+            if len(values) != ndef * ndim:
+                raise ValueError('Column ' + columnname + ' contains arrays'
+                                 ' with different dimensionalities')
+            shapes[definx] = values.reshape(ndef, ndim)
+        return shapes
+
+    def shapegroups(self, columnname, startrow=0, nrow=-1, rowincr=1):
+        """Group the rows of a column by the shape of their cells.
+
+        It returns a dict mapping each shape (as a tuple) to a numpy array of
+        the row numbers having that shape. It makes it possible to process a
+        column containing variable shaped arrays by one :func:`getcol` per
+        shape. Undefined cells have a shape of zeros.
+
+        For example::
+
+          for shape, rownrs in t.shapegroups('DATA').items():
+              if min(shape) > 0:
+                  data = t.selectrows(rownrs).getcol('DATA')
+
+        The column can be sliced by giving a start row (default 0), number of
+        rows (default all), and row stride (default 1).
+
+        """
+        shapes = self.getcolshapes(columnname, startrow, nrow, rowincr)
+        rownrs = startrow + rowincr * numpy.arange(len(shapes))
+        return dict([(shape, rownrs[rows])
+                     for shape, rows in self._shapegroups(shapes)])
+
     def iscelldefined(self, columnname, rownr):
         """Tell if a column cell contains a value.
 
@@ -946,14 +1491,34 @@ class table(Table):
         """
         return self._iscelldefined(columnname, rownr)
 
-    def getcell(self, columnname, rownr):
+    def getcell(self, columnname, rownr, out=None):
         """Get data from a column cell.
 
         Get the contents of a cell which can be returned as a scalar value,
         a numpy array, or a dict depending on the contents of the cell.
 
-        """
-        return self._getcell(columnname, rownr)
+        If the cell cache is enabled (see :func:`setcellcache`), the value
+        is taken from the cache if possible.
+
+        `out` can be a numpy array with the shape of the cell into which
+        the array is read (and which is returned). If it is C-contiguous
+        and has the type of the column, the data are read directly into it
+        (see :func:`getcellnp`), otherwise they are copied into it.
+
+        """
+        cache = self._cellcache
+        if out is not None:
+            if cache is not None:
+                out[...] = self.getcell(columnname, rownr)
+                return out
+            return _getinto(out, self.coldatatype(columnname),
+                            lambda arr: self._getcellvh(columnname, rownr,
+                                                        arr),
+                            lambda: self._getcell(columnname, rownr))
+        if cache is None:
+            return self._getcell(columnname, rownr)
+        return cache.get((columnname, rownr), self._getcell,
+                         columnname, rownr)
 
     def getcellnp(self, columnname, rownr, nparray):
         """Get data from a column cell into the given numpy array .
@@ -969,7 +1534,7 @@ class table(Table):
                              "numpy array")
         return self._getcellvh(columnname, rownr, nparray)
 
-    def getcellslice(self, columnname, rownr, blc, trc, inc=[]):
+    def getcellslice(self, columnname, rownr, blc, trc, inc=[], out=None):
         """Get a slice from a column cell holding an array.
 
         The columnname and (0-relative) rownr indicate the table cell.
@@ -980,7 +1545,16 @@ class table(Table):
         to begin, end, and 1. A negative blc or trc defaults to begin or end.
         Note that trc is inclusive (unlike python indexing).
 
+        `out` can be a numpy array into which the slice is read
+        (see :func:`getcell`).
+
         """
+        if out is not None:
+            return _getinto(out, self.coldatatype(columnname),
+                            lambda arr: self._getcellslicevh(
+                                columnname, rownr, blc, trc, inc, arr),
+                            lambda: self._getcellslice(columnname, rownr,
+                                                       blc, trc, inc))
         return self._getcellslice(columnname, rownr,
                                   blc, trc, inc)
 
@@ -1005,7 +1579,8 @@ class table(Table):
         return self._getcellslicevh(columnname, rownr,
                                     blc, trc, inc, nparray)
 
-    def getcol(self, columnname, startrow=0, nrow=-1, rowincr=1):
+    def getcol(self, columnname, startrow=0, nrow=-1, rowincr=1, out=None,
+               transform=None, dtype=None, packbits=False):
         """Get the contents of a column or part of it.
 
         It is returned as a numpy array.
@@ -1016,7 +1591,61 @@ class table(Table):
         The column can be sliced by giving a start row (default 0), number of
         rows (default all), and row stride (default 1).
 
-        """
+        `out` can be a numpy array into which the data are read
+        (see :func:`getcell`). It makes it possible to reuse a buffer
+        in a loop.
+
+        `transform` can be 'amp', 'phase', 'real' or 'imag' to get the
+        amplitude, phase (in radians), real or imaginary part of complex
+        values. `dtype` can be given to convert the result to another data
+        type (e.g. numpy.float16). If one of them is given, the column is read
+        and converted in chunks of about 16 MB, so no full size intermediate
+        array is needed. E.g., the amplitudes of a complex64 DATA column
+        are obtained as float32 using half the memory of the data.
+        A complex column can only be converted to a real `dtype` together
+        with a transform; otherwise a TypeError is raised.
+
+        If `packbits=True`, a boolean column (e.g. FLAG) is returned as
+        uint8 values with 8 flags packed in a byte as done by numpy.packbits.
+        The flags are packed along the first axis of the arrays (the channel
+        axis in a MeasurementSet), thus the result of a FLAG column with
+        shape (nrow, nchan, ncorr) has shape (nrow, (nchan+7)//8, ncorr).
+        The column is read in chunks, so it takes 8 times less memory than
+        a boolean array. For a column containing scalars, the flags of the
+        rows are packed. The result can be written back with
+        :func:`putcol` using `packed=True`.
+
+        """
+        if packbits:
+            if self.coldatatype(columnname) != 'boolean':
+                raise ValueError('packbits can only be used for a boolean '
+                                 'column')
+            if self.isscalarcol(columnname):
+                return numpy.packbits(self._getcol(columnname, startrow,
+                                                   nrow, rowincr))
+            return self._getcoltransformed(
+                columnname, startrow, nrow, rowincr, out,
+                lambda flags: numpy.packbits(flags, axis=1), None)
+        if transform is not None or dtype is not None:
+            if transform not in _transforms:
+                raise ValueError('Unknown transform ' + str(transform) +
+                                 '; valid are ' + str([x for x in _transforms
+                                                       if x is not None]))
+            if (transform is None and dtype is not None and
+                    numpy.dtype(dtype).kind not in 'cO' and
+                    self.coldatatype(columnname) in ('complex', 'dcomplex')):
+                raise TypeError('Complex column ' + columnname + ' cannot '
+                                'be converted to ' + str(numpy.dtype(dtype)) +
+                                '; use a transform such as amp or real')
+            return self._getcoltransformed(columnname, startrow, nrow,
+                                           rowincr, out,
+                                           _transforms[transform], dtype)
+        if out is not None:
+            return _getinto(out, self.coldatatype(columnname),
+                            lambda arr: self._getcolvh(
+                                columnname, startrow, nrow, rowincr, arr),
+                            lambda: self._getcol(columnname, startrow, nrow,
+                                                 rowincr))
         #        try:     # trial code to read using a vector of rownrs
         #            nr = len(startrow)
         #            if nrow < 0:
@@ -1028,6 +1657,100 @@ class table(Table):
         #        except:
         return self._getcol(columnname, startrow, nrow, rowincr)
 
+    def getcol_masked(self, datacol, flagcol='FLAG', startrow=0, nrow=-1,
+                      rowincr=1, flagrowcol='FLAG_ROW', transform=None,
+                      dtype=None, chunkrows=0):
+        """Get the contents of a data column as a numpy masked array.
+
+        The mask is formed by the flag column, which must have the same
+        shape as the data column, and the row flag column (if existing),
+        which is broadcast over the other axes. Like
+        :func:`casacore.images.image.get`, True means masked (flagged).
+        If `flagcol` or `flagrowcol` is None or does not exist, it is not
+        used.
+
+        The data and flags are read alternately in chunks of rows directly
+        into the arrays of the masked array, so both columns are read in a
+        single pass without intermediate copies. By default chunks of about
+        64 MB are used.
+
+        The column can be sliced by giving a start row (default 0), number of
+        rows (default all), and row stride (default 1). `transform` and
+        `dtype` can be given to convert the data (see :func:`getcol`).
+
+        For example::
+
+          vis = t.getcol_masked('DATA')
+          meanvis = vis.mean(axis=0)    # average unflagged data over rows
+
+        """
+        import numpy.ma as nma
+        colnames = self.colnames()
+        if flagcol not in colnames:
+            flagcol = None
+        if flagrowcol not in colnames:
+            flagrowcol = None
+        if nrow < 0:
+            nrow = (self.nrows() - startrow + rowincr - 1) // rowincr
+        columns = ','.join([x for x in (datacol, flagcol) if x])
+        chunkrows = self.select(columns)._chunkrows(chunkrows)
+        data = None
+        for inx in range(0, nrow, chunkrows):
+            n = min(chunkrows, nrow - inx)
+            rownr = startrow + inx * rowincr
+            if data is None:
+                value = self.getcol(datacol, rownr, n, rowincr,
+                                    transform=transform, dtype=dtype)
+                data = numpy.empty((nrow,) + value.shape[1:], value.dtype)
+                data[:n] = value
+                mask = numpy.zeros(data.shape, bool)
+            else:
+                self.getcol(datacol, rownr, n, rowincr, out=data[inx:inx + n],
+                            transform=transform, dtype=dtype)
+            if flagcol:
+                self.getcol(flagcol, rownr, n, rowincr, out=mask[inx:inx + n])
+            if flagrowcol:
+                flagrow = self.getcol(flagrowcol, rownr, n, rowincr)
+                mask[inx:inx + n] |= flagrow.reshape(
+                    (n,) + (1,) * (mask.ndim - 1))
+        if data is None:
+            data = self.getcol(datacol, startrow, 0, rowincr,
+                               transform=transform, dtype=dtype)
+            mask = numpy.zeros(data.shape, bool)
+        return nma.masked_array(data, mask, copy=False)
+
+    def _getcoltransformed(self, columnname, startrow, nrow, rowincr, out,
+                           func, dtype, chunkbytes=16*1024*1024):
+        """Get a column in chunks while transforming its values."""
+        if nrow < 0:
+            nrow = (self.nrows() - startrow + rowincr - 1) // rowincr
+        cellsize = 1
+        if not self.isscalarcol(columnname) and nrow > 0:
+            cellsize = max(1, int(numpy.prod(self.getcolshapes(
+                columnname, startrow, 1)[0])))
+        chunkrows = max(1, chunkbytes // (16 * cellsize))
+        result = out
+        buf = None
+        for inx in range(0, nrow, chunkrows):
+            n = min(chunkrows, nrow - inx)
+            rownr = startrow + inx * rowincr
+            if buf is None or len(buf) != n or buf.dtype.kind not in 'biufc':
+                buf = numpy.asarray(self.getcol(columnname, rownr, n,
+                                                rowincr))
+            else:
+                self.getcol(columnname, rownr, n, rowincr, out=buf)
+            value = func(buf)
+            if result is None:
+                result = numpy.empty((nrow,) + value.shape[1:],
+                                     value.dtype if dtype is None else dtype)
+            result[inx:inx + n] = value
+        if result is None:
+            result = func(numpy.asarray(self.getcol(columnname, startrow, 0,
+                                                    rowincr)))
+            if dtype is not None:
+                result = result.astype(dtype)
+        return result
+
     def getcolnp(self, columnname, nparray, startrow=0, nrow=-1, rowincr=1):
         """Get the contents of a column or part of it into the given
         numpy array.
@@ -1048,18 +1771,76 @@ class table(Table):
                              "numpy array")
         return self._getcolvh(columnname, startrow, nrow, rowincr, nparray)
 
-    def getvarcol(self, columnname, startrow=0, nrow=-1, rowincr=1):
+    def getvarcol(self, columnname, startrow=0, nrow=-1, rowincr=1,
+                  ragged=False):
         """Get the contents of a column or part of it.
 
         It is similar to :func:`getcol`, but the result is returned as a
         dict of numpy arrays.
         It can deal with a column containing variable shaped arrays.
 
-        """
-        return self._getvarcol(columnname, startrow, nrow, rowincr)
+        If `ragged=True`, the result is a dict containing the arrays of all
+        rows in a flat form, which is much faster and smaller for many rows:
+
+        - `values`: a 1-dim array containing the values of all cells
+          (each cell in C order)
+        - `shapes`: an integer array with shape (nrow, ndim) giving the
+          shape of each cell (a shape of zeros for an undefined cell)
+        - `offsets`: an integer array with length nrow+1 giving the index in
+          `values` of the first value of each cell (and the end of the last)
+
+        For example, the array in the third row is obtained like::
+
+          r = t.getvarcol('DATA', ragged=True)
+          cell = r['values'][r['offsets'][2]:r['offsets'][3]]
+          cell = cell.reshape(r['shapes'][2])
+
+        The cells are read with a single :func:`getcol` per unique shape.
+
+        """
+        if not ragged:
+            return self._getvarcol(columnname, startrow, nrow, rowincr)
+        shapes = self.getcolshapes(columnname, startrow, nrow, rowincr)
+        nrow = len(shapes)
+        offsets = numpy.zeros(nrow + 1, numpy.int64)
+        # No axes at all means that no cell is defined.
+        if shapes.shape[1] > 0:
+            numpy.cumsum(shapes.prod(axis=1), out=offsets[1:])
+        rownrs = startrow + rowincr * numpy.arange(nrow)
+        values = None
+        for shape, rows in self._shapegroups(shapes):
+            if len(shape) == 0 or numpy.prod(shape) == 0:
+                continue
+            if len(rows) == nrow:
+                data = self.getcol(columnname, startrow, nrow, rowincr)
+            else:
+                data = self.selectrows(rownrs[rows]).getcol(columnname)
+            data = numpy.asarray(data).reshape(len(rows), -1)
+            if len(rows) == nrow:
+                values = data.ravel()
+                break
+            if values is None:
+                values = numpy.empty(offsets[-1], data.dtype)
+            for st, end, inx in _raggedblocks(offsets, rows, data.shape[1]):
+                values[inx] = data[st:end].ravel()
+        if values is None:
+            values = numpy.zeros(0, _coldtype(self.getcoldesc(columnname)))
+        return {'values': values, 'shapes': shapes, 'offsets': offsets}
+
+    @staticmethod
+    def _shapegroups(shapes):
+        """Yield the unique shapes with the indices having that shape."""
+        if len(shapes) == 0:
+            return
+        unique, inverse = numpy.unique(shapes, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        order = numpy.argsort(inverse, kind='stable')
+        ends = numpy.flatnonzero(numpy.diff(inverse[order])) + 1
+        for shape, rows in zip(unique, numpy.split(order, ends)):
+            yield tuple(shape.tolist()), rows
 
     def getcolslice(self, columnname, blc, trc, inc=[],
-                    startrow=0, nrow=-1, rowincr=1):
+                    startrow=0, nrow=-1, rowincr=1, out=None):
         """Get a slice from a table column holding arrays.
 
         The slice in each array is given by blc, trc, and inc
@@ -1070,10 +1851,79 @@ class table(Table):
         It returns a numpy array where the first axis is formed by the column
         cells. The other axes are the array axes.
 
+        `out` can be a numpy array into which the data are read
+        (see :func:`getcell`).
+
         """
+        if out is not None:
+            return _getinto(out, self.coldatatype(columnname),
+                            lambda arr: self._getcolslicevh(
+                                columnname, blc, trc, inc, startrow, nrow,
+                                rowincr, arr),
+                            lambda: self._getcolslice(columnname, blc, trc,
+                                                      inc, startrow, nrow,
+                                                      rowincr))
         return self._getcolslice(columnname, blc, trc, inc,
                                  startrow, nrow, rowincr)
 
+    def getcolslices(self, columnname, slices, startrow=0, nrow=-1,
+                     rowincr=1):
+        """Get multiple slices from a table column holding arrays.
+
+        `slices` is a sequence of tuples (blc, trc) or (blc, trc, inc)
+        defining the slices as in :func:`getcolslice`; e.g. several
+        channel ranges. It returns a list containing the result of each
+        slice.
+
+        The slices are read in one :func:`getcolslice` of the box enclosing
+        them, so a tile containing data of multiple slices is read only once.
+        However, if the slices cover less than half of that box (e.g. a few
+        channels at both ends of a band), each slice is read separately.
+        The cells in the column must have the same shape.
+
+        The column can be sliced by giving a start row (default 0), number of
+        rows (default all), and row stride (default 1).
+
+        For example::
+
+          d1, d2 = t.getcolslices('DATA', [([10, 0], [19, 3]),
+                                           ([50, 0], [79, 3], [2, 1])])
+
+        """
+        if len(slices) == 0:
+            return []
+        shape = self.getcolshapes(columnname, startrow, 1)[0]
+        boxes = []
+        for slc in slices:
+            blc, trc = list(slc[0]), list(slc[1])
+            inc = list(slc[2]) if len(slc) > 2 else []
+            box = []
+            for axis, length in enumerate(shape):
+                start = blc[axis] if axis < len(blc) else -1
+                end = trc[axis] if axis < len(trc) else -1
+                box.append((start if start >= 0 else 0,
+                            end if end >= 0 else length - 1,
+                            inc[axis] if axis < len(inc) else 1))
+            boxes.append(box)
+        bblc = [min([box[axis][0] for box in boxes])
+                for axis in range(len(shape))]
+        btrc = [max([box[axis][1] for box in boxes])
+                for axis in range(len(shape))]
+        bsize = numpy.prod([e - s + 1 for s, e in zip(bblc, btrc)])
+        size = sum([numpy.prod([e - s + 1 for s, e, i in box])
+                    for box in boxes])
+        if 2 * size < bsize:
+            return [self.getcolslice(columnname, [b[0] for b in box],
+                                     [b[1] for b in box], [b[2] for b in box],
+                                     startrow, nrow, rowincr)
+                    for box in boxes]
+        data = self.getcolslice(columnname, bblc, btrc, [],
+                                startrow, nrow, rowincr)
+        return [data[(slice(None),) +
+                     tuple([slice(s - b, e - b + 1, i)
+                            for (s, e, i), b in zip(box, bblc)])]
+                for box in boxes]
+
     def getcolslicenp(self, columnname, nparray, blc, trc, inc=[],
                       startrow=0, nrow=-1, rowincr=1):
         """Get a slice from a table column into the given numpy array.
@@ -1117,6 +1967,7 @@ class table(Table):
 
         """
         self._putcell(columnname, rownr, value)
+        self._clearcellcache(columnname)
 
     def putcellslice(self, columnname, rownr, value, blc, trc, inc=[]):
         """Put into a slice of a table cell holding an array.
@@ -1137,8 +1988,10 @@ class table(Table):
         """
         self._putcellslice(columnname, rownr, value,
                            blc, trc, inc)
+        self._clearcellcache(columnname)
 
-    def putcol(self, columnname, value, startrow=0, nrow=-1, rowincr=1):
+    def putcol(self, columnname, value, startrow=0, nrow=-1, rowincr=1,
+               packed=False):
         """Put an entire column or part of it.
 
         If the column contains scalar values, the given value should be a 1-dim
@@ -1148,20 +2001,85 @@ class table(Table):
         The column can be sliced by giving a start row (default 0), number of
         rows (default all), and row stride (default 1).
 
+        If `packed=True`, the value of a boolean column is given as uint8
+        values containing packed flags as returned by :func:`getcol` with
+        `packbits=True`. The flags are unpacked in chunks while being written.
+        The length of the first array axis is taken from the column
+        description or from the first cell to write.
+
         """
-        self._putcol(columnname, startrow, nrow, rowincr, value)
+        if packed:
+            self._putcolpacked(columnname, numpy.asarray(value, numpy.uint8),
+                               startrow, nrow, rowincr)
+        else:
+            self._putcol(columnname, startrow, nrow, rowincr, value)
+        self._clearcellcache(columnname)
+
+    def _putcolpacked(self, columnname, value, startrow, nrow, rowincr,
+                      chunkbytes=16*1024*1024):
+        """Unpack packed flags and put them in chunks."""
+        if self.isscalarcol(columnname):
+            if nrow < 0:
+                nrow = (self.nrows() - startrow + rowincr - 1) // rowincr
+            flags = numpy.unpackbits(value, count=nrow).astype(bool)
+            return self._putcol(columnname, startrow, nrow, rowincr, flags)
+        if nrow >= 0 and nrow != len(value):
+            raise ValueError('nrow mismatches the length of the value')
+        shape = self.getcoldesc(columnname).get('shape', [])
+        if len(shape) == 0 and len(value) > 0:
+            shape = self.getcolshapes(columnname, startrow, 1)[0]
+        if len(value) > 0 and (len(shape) == 0 or shape[0] == 0):
+            raise ValueError('The shape of the cells in column ' +
+                             columnname + ' is unknown')
+        chunkrows = max(1, chunkbytes // max(1, int(numpy.prod(shape))))
+        for inx in range(0, len(value), chunkrows):
+            chunk = value[inx:inx + chunkrows]
+            flags = numpy.unpackbits(chunk, axis=1, count=shape[0])
+            self._putcol(columnname, startrow + inx * rowincr, len(chunk),
+                         rowincr, flags.astype(bool))
 
     def putvarcol(self, columnname, value, startrow=0, nrow=-1, rowincr=1):
         """Put an entire column or part of it.
 
         It is similar to putcol, but the shapes of the arrays in the column
         can vary. The value has to be a dict of numpy arrays.
+        It can also be a dict in the ragged form as returned by
+        :func:`getvarcol` with `ragged=True`, where `offsets` can be
+        omitted if the values of the cells are contiguous. Cells with a shape
+        of zeros are not written.
+        The cells are written with a single :func:`putcol` per unique shape.
 
         The column can be sliced by giving a start row (default 0), number of
         rows (default all), and row stride (default 1).
 
         """
-        self._putvarcol(columnname, startrow, nrow, rowincr, value)
+        if not (isinstance(value, dict) and 'values' in value):
+            self._putvarcol(columnname, startrow, nrow, rowincr, value)
+        else:
+            shapes = numpy.asarray(value['shapes'], int)
+            values = numpy.asarray(value['values']).ravel()
+            if 'offsets' in value:
+                offsets = numpy.asarray(value['offsets'], numpy.int64)
+            else:
+                offsets = numpy.zeros(len(shapes) + 1, numpy.int64)
+                numpy.cumsum(shapes.prod(axis=1), out=offsets[1:])
+            if nrow >= 0 and nrow != len(shapes):
+                raise ValueError('nrow mismatches the number of shapes')
+            rownrs = startrow + rowincr * numpy.arange(len(shapes))
+            for shape, rows in self._shapegroups(shapes):
+                size = int(numpy.prod(shape))
+                if size == 0:
+                    continue
+                blocks = list(_raggedblocks(offsets, rows, size))
+                if len(blocks) == 1 and isinstance(blocks[0][2], slice):
+                    data = values[blocks[0][2]]
+                else:
+                    data = numpy.empty((len(rows), size), values.dtype)
+                    for st, end, inx in blocks:
+                        data[st:end] = values[inx].reshape(end - st, size)
+                data = data.reshape((len(rows),) + shape)
+                self.selectrows(rownrs[rows]).putcol(columnname, data)
+        self._clearcellcache(columnname)
 
     def putcolslice(self, columnname, value, blc, trc, inc=[],
                     startrow=0, nrow=-1, rowincr=1):
@@ -1172,6 +2090,7 @@ class table(Table):
         """
         self._putcolslice(columnname, value, blc, trc, inc,
                           startrow, nrow, rowincr)
+        self._clearcellcache(columnname)
 
     def addcols(self, desc, dminfo={}, addtoparent=True):
         """Add one or more columns.
@@ -1221,6 +2140,7 @@ class table(Table):
                 cd = pt.makecoldesc(desc['name'], desc)
                 tdesc = pt.maketabdesc(cd)
         self._addcols(tdesc, dminfo, addtoparent)
+        self._clearcellcache()
         self._makerow()
 
     def renamecol(self, oldname, newname):
@@ -1231,6 +2151,7 @@ class table(Table):
 
         """
         self._renamecol(oldname, newname)
+        self._clearcellcache()
         self._makerow()
 
     def removecols(self, columnnames):
@@ -1245,6 +2166,7 @@ class table(Table):
 
         """
         self._removecols(columnnames)
+        self._clearcellcache()
         self._makerow()
 
     def keywordnames(self):
@@ -1643,6 +2565,155 @@ class table(Table):
         # selectrows returns a Table object, so turn that into table.
         return table(t, _oper=3)
 
+    def partition(self, nparts, by='rows', align_to_tiles=True):
+        """Partition the table into parts to be processed in parallel.
+
+        It returns a list of at most `nparts` :class:`tableselection` objects
+        describing disjoint parts of the table containing about the same
+        number of rows. They can be sent to worker processes which use their
+        :func:`tableselection.open` to get the part as a table.
+
+        `by`
+          'rows' makes contiguous row ranges.
+          'time' makes row ranges not splitting the rows of a time (as given
+          in column TIME). If the table is not in time order, a part consists
+          of the rows of a set of times.
+          'baseline' makes parts containing all rows of a set of baselines
+          (as given by columns ANTENNA1 and ANTENNA2).
+        `align_to_tiles`
+          If True, the boundaries of the row ranges are put at the row
+          boundaries of the tiles of the tiled storage managers (as given
+          by :func:`getdminfo`), so the parts do not read the same tiles.
+          For `by='time'` the time boundaries nearest to the tile
+          boundaries are used.
+
+        For example::
+
+          parts = t.partition(8, by='time')
+          results = pool.map(process, parts)
+
+          def process(part):
+              tp = part.open()
+              ...
+
+        """
+        from .tableselection import tableselection
+        nrow = self.nrows()
+        if nrow == 0:
+            return []
+        nparts = max(1, min(nparts, nrow))
+        if by == 'baseline':
+            bl = self.getcol('ANTENNA1') * (self.getcol('ANTENNA2').max() +
+                                            1) + self.getcol('ANTENNA2')
+            ubl, inverse, counts = numpy.unique(bl, return_inverse=True,
+                                                return_counts=True)
+            # Assign the largest baselines first to the smallest part.
+            partnr = numpy.zeros(len(ubl), int)
+            sizes = numpy.zeros(nparts, int)
+            for inx in numpy.argsort(-counts, kind='stable'):
+                partnr[inx] = numpy.argmin(sizes)
+                sizes[partnr[inx]] += counts[inx]
+            rowpart = partnr[inverse.ravel()]
+            return [tableselection(self.selectrows(
+                        numpy.flatnonzero(rowpart == part)))
+                    for part in range(nparts) if sizes[part] > 0]
+        if by not in ('rows', 'time'):
+            raise ValueError("by must be 'rows', 'time' or 'baseline'")
+        # Find the possible boundaries.
+        candidates = None
+        if by == 'time':
+            time = self.getcol('TIME')
+            if len(time) > 1 and (numpy.diff(time) < 0).any():
+                # Not in time order; assign sets of times to the parts.
+                utime, inverse = numpy.unique(time, return_inverse=True)
+                nparts = min(nparts, len(utime))
+                rowpart = (inverse.ravel() * nparts) // len(utime)
+                return [tableselection(self.selectrows(
+                            numpy.flatnonzero(rowpart == part)))
+                        for part in range(nparts)]
+            candidates = numpy.flatnonzero(numpy.diff(time)) + 1
+        tilerows = []
+        if align_to_tiles and self.name() in self.partnames(True):
+            from .tablehelper import _tiledcubes
+            for dminfo in self.getdminfo().values():
+                tilerows += [tileshape[0] for cubeshape, tileshape, bs
+                             in _tiledcubes(dminfo)
+                             if cubeshape[0] == nrow]
+        align = 1
+        if len(tilerows) > 0:
+            align = int(numpy.lcm.reduce(tilerows))
+            if align > nrow // nparts:
+                align = max(tilerows)
+        ideal = numpy.arange(1, nparts) * nrow / nparts
+        if align > 1:
+            ideal = numpy.round(ideal / align) * align
+        if candidates is not None:
+            # Use the time boundaries nearest to the ideal boundaries.
+            if len(candidates) == 0:
+                ideal = numpy.zeros(0)
+            else:
+                inx = numpy.searchsorted(candidates, ideal)
+                low = candidates[numpy.maximum(inx - 1, 0)]
+                high = candidates[numpy.minimum(inx, len(candidates) - 1)]
+                ideal = numpy.where(ideal - low <= high - ideal, low, high)
+        bounds = numpy.unique(numpy.concatenate(
+            [[0], numpy.clip(ideal, 0, nrow).astype(int), [nrow]]))
+        return [tableselection(self, startrow=int(start),
+                               nrow=int(end - start))
+                for start, end in zip(bounds[:-1], bounds[1:])]
+
+    def to_dask(self, columnname, chunks=None):
+        """Get a column as a lazy dask array.
+
+        The array has shape (nrow,) + cellshape, so the column must contain
+        scalars or fixed shaped arrays. Nothing is read until (part of) the
+        array is computed; each chunk is read by reopening the table by name
+        (using a :class:`tableselection`) and doing a :func:`getcolslice`.
+        Thus the array can be computed by any dask scheduler, also one using
+        multiple processes. Changes made to the table have to be flushed
+        before the array is computed.
+
+        `chunks`
+          The chunk shape as accepted by dask (e.g. (1000, -1, -1)).
+          By default the chunks consist of whole tiles of the column as
+          given by :func:`getdminfo` and contain about 64 MB.
+
+        For example::
+
+          data = t.to_dask('DATA')
+          amp = abs(data).mean(axis=0).compute()
+
+        """
+        from .tablehelper import _daskarray, _daskchunks, _tiledcubes
+        from .tableselection import tableselection
+        nrow = self.nrows()
+        coldesc = self.getcoldesc(columnname)
+        cellshape = []
+        if not self.isscalarcol(columnname):
+            if nrow == 0:
+                # No cells, so use the shape in the column description.
+                shapes = [coldesc.get('shape',
+                                      [0] * max(0, coldesc.get('ndim', 0)))]
+            else:
+                shapes = numpy.unique(self.getcolshapes(columnname), axis=0)
+            if len(shapes) != 1:
+                raise ValueError('Column ' + columnname + ' does not'
+                                 ' contain fixed shaped arrays')
+            cellshape = [int(n) for n in shapes[0]]
+        shape = [nrow] + cellshape
+        dtype = _coldtype(coldesc)
+        if chunks is None:
+            tileshape = [1] + cellshape
+            if self.name() in self.partnames(True):
+                for cubeshape, tiles, bs in _tiledcubes(
+                        self.getdminfo(columnname)):
+                    if cubeshape == shape:
+                        tileshape = tiles
+            chunks = _daskchunks(shape, tileshape, dtype.itemsize)
+        return _daskarray('casacore-' + columnname, _daskcolumnchunk,
+                          (tableselection(self), columnname, cellshape),
+                          shape, chunks, dtype)
+
     def query(self, query='', name='', sortlist='', columns='',
               limit=0, offset=0, style='Python'):
         """Query the table and return the result as a reference table.
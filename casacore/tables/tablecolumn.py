@@ -116,35 +116,60 @@ class tablecolumn:
         return self._table.getcolshapestring(self._column,
                                              startrow, nrow, rowincr)
 
+    def getshapes(self, startrow=0, nrow=-1, rowincr=1):
+        """Get the shapes of all cells in the column as an integer array.
+        (see :func:`table.getcolshapes`)"""
+        return self._table.getcolshapes(self._column,
+                                        startrow, nrow, rowincr)
+
+    def shapegroups(self, startrow=0, nrow=-1, rowincr=1):
+        """Group the rows of the column by the shape of their cells.
+        (see :func:`table.shapegroups`)"""
+        return self._table.shapegroups(self._column,
+                                       startrow, nrow, rowincr)
+
     def iscelldefined(self, rownr):
         """Tell if a column cell contains a value.
         (see :func:`table.iscelldefined`)"""
         return self._table.iscelldefined(self._column, rownr)
 
-    def getcell(self, rownr):
+    def getcell(self, rownr, out=None):
         """Get data from a column cell.
         (see :func:`table.getcell`)"""
-        return self._table.getcell(self._column, rownr)
+        return self._table.getcell(self._column, rownr, out=out)
 
-    def getcellslice(self, rownr, blc, trc, inc=[]):
+    def getcellslice(self, rownr, blc, trc, inc=[], out=None):
         """Get a slice from a column cell holding an array.
         (see :func:`table.getcellslice`)"""
-        return self._table.getcellslice(self._column, rownr, blc, trc, inc)
+        return self._table.getcellslice(self._column, rownr, blc, trc, inc,
+                                        out=out)
 
-    def getcol(self, startrow=0, nrow=-1, rowincr=1):
+    def getcol(self, startrow=0, nrow=-1, rowincr=1, out=None,
+               transform=None, dtype=None, packbits=False):
         """Get the contents of the column or part of it.
         (see :func:`table.getcol`)"""
-        return self._table.getcol(self._column, startrow, nrow, rowincr)
+        return self._table.getcol(self._column, startrow, nrow, rowincr,
+                                  out=out, transform=transform, dtype=dtype,
+                                  packbits=packbits)
 
-    def getvarcol(self, startrow=0, nrow=-1, rowincr=1):
+    def getvarcol(self, startrow=0, nrow=-1, rowincr=1, ragged=False):
         """Get the contents of the column or part of it.
         (see :func:`table.getvarcol`)"""
-        return self._table.getvarcol(self._column, startrow, nrow, rowincr)
+        return self._table.getvarcol(self._column, startrow, nrow, rowincr,
+                                     ragged)
 
-    def getcolslice(self, blc, trc, inc=[], startrow=0, nrow=-1, rowincr=1):
+    def getcolslice(self, blc, trc, inc=[], startrow=0, nrow=-1, rowincr=1,
+                    out=None):
         """Get a slice from a table column holding arrays.
         (see :func:`table.getcolslice`)"""
-        return self._table.getcolslice(self._column, blc, trc, inc, startrow, nrow, rowincr)
+        return self._table.getcolslice(self._column, blc, trc, inc, startrow,
+                                       nrow, rowincr, out=out)
+
+    def getcolslices(self, slices, startrow=0, nrow=-1, rowincr=1):
+        """Get multiple slices from a table column holding arrays.
+        (see :func:`table.getcolslices`)"""
+        return self._table.getcolslices(self._column, slices,
+                                        startrow, nrow, rowincr)
 
     def putcell(self, rownr, value):
         """Put a value into one or more table cells.
@@ -156,10 +181,11 @@ class tablecolumn:
         (see :func:`table.putcellslice`)"""
         return self._table.putcellslice(self._column, rownr, value, blc, trc, inc)
 
-    def putcol(self, value, startrow=0, nrow=-1, rowincr=1):
+    def putcol(self, value, startrow=0, nrow=-1, rowincr=1, packed=False):
         """Put an entire column or part of it.
         (see :func:`table.putcol`)"""
-        return self._table.putcol(self._column, value, startrow, nrow, rowincr)
+        return self._table.putcol(self._column, value, startrow, nrow, rowincr,
+                                  packed)
 
     def putvarcol(self, value, startrow=0, nrow=-1, rowincr=1):
         """Put an entire column or part of it.
@@ -27,6 +27,8 @@
 
 import numpy
 import re
+import sys
+from collections import OrderedDict
 from ..quanta import quantity
 
 
@@ -108,6 +110,304 @@ def _check_key_slice(key, nrows, name):
     return [strow, nrow, incr]
 
 
+def _cell_nbytes(value):
+    """Return the approximate size of a cell value or -1 if not cacheable."""
+    if isinstance(value, numpy.ndarray):
+        if value.dtype.hasobject:
+            return -1
+        return value.nbytes
+    if isinstance(value, (bool, int, float, complex, str, numpy.generic)):
+        return sys.getsizeof(value)
+    return -1
+
+
+class _cellcache:
+    """Bounded LRU cache of decoded cell values (see table.setcellcache).
+
+    Cells are keyed by (columnname, rownr). Rows read by a tablerow object
+    are keyed by (None, rowkey, rownr) where rowkey defines the columns in
+    the row. A copy of a cached array is returned, so the caller can change
+    it without changing the cache.
+    The cache does not keep a reference to the table, otherwise the table
+    would not be closed when the table object is deleted. Instead `changed`
+    is a weak reference to a function telling if the table data have been
+    changed (by another process). It is only called on a cache hit.
+
+    """
+
+    def __init__(self, maxbytes, changed=None):
+        self.maxbytes = maxbytes
+        self.datachanged = False
+        self._changed = changed
+        self._cells = OrderedDict()
+        self._rowkeys = set()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def _add(self, key, value, nbytes):
+        if nbytes < 0 or nbytes > self.maxbytes:
+            return False
+        self._cells[key] = (value, nbytes)
+        self._nbytes += nbytes
+        while self._nbytes > self.maxbytes:
+            self._nbytes -= self._cells.popitem(last=False)[1][1]
+        return True
+
+    def _lookup(self, key):
+        """Get the cache entry of a key, clearing the cache if data changed."""
+        entry = self._cells.get(key)
+        if entry is not None:
+            changed = None if self._changed is None else self._changed()
+            if changed is not None and changed():
+                self.clear()
+                self.datachanged = True
+                return None
+            self._cells.move_to_end(key)
+            self._hits += 1
+        else:
+            self._misses += 1
+        return entry
+
+    def get(self, key, getter, *args):
+        """Get a cell value from the cache or read it using getter."""
+        entry = self._lookup(key)
+        if entry is None:
+            value = getter(*args)
+            self._add(key, value, _cell_nbytes(value))
+        else:
+            value = entry[0]
+        if isinstance(value, numpy.ndarray):
+            return value.copy()
+        return value
+
+    def getrow(self, rowkey, rownr, getter):
+        """Get a row (as a dict) from the cache or read it using getter."""
+        key = (None, rowkey, rownr)
+        entry = self._lookup(key)
+        if entry is None:
+            value = getter(rownr)
+            nbytes = 0
+            for val in value.values():
+                n = _cell_nbytes(val)
+                if n < 0:
+                    return value
+                nbytes += n
+            if self._add(key, value, nbytes):
+                self._rowkeys.add(rowkey)
+        else:
+            value = entry[0]
+        return {name: val.copy() if isinstance(val, numpy.ndarray) else val
+                for name, val in value.items()}
+
+    def clearrow(self, rownr, columnnames):
+        """Remove the cells of the given columns in a row (and the row)."""
+        keys = [(col, rownr) for col in columnnames]
+        keys += [(None, rowkey, rownr) for rowkey in self._rowkeys]
+        for key in keys:
+            entry = self._cells.pop(key, None)
+            if entry is not None:
+                self._nbytes -= entry[1]
+
+    def clear(self, columnname=None):
+        """Remove all cells or the cells of a column (and all rows)."""
+        if columnname is None:
+            self._cells.clear()
+            self._rowkeys.clear()
+            self._nbytes = 0
+            return
+        for key in [k for k in self._cells if k[0] is None or
+                    k[0] == columnname]:
+            self._nbytes -= self._cells.pop(key)[1]
+
+    def stats(self):
+        """Return the cache statistics as a dict."""
+        return {'hits': self._hits,
+                'misses': self._misses,
+                'ncells': len(self._cells),
+                'nbytes': self._nbytes,
+                'maxbytes': self.maxbytes}
+
+
+def _tiledcubes(dminfo):
+    """Get the hypercubes of a tiled storage manager from its dminfo.
+
+    It returns a list of (cubeshape, tileshape, bucketsize) where the shapes
+    are in C order, thus the row axis first and the cell axes thereafter.
+    An empty list is returned if the data manager is not a tiled one.
+
+    """
+    if not dminfo.get('TYPE', '').startswith('Tiled'):
+        return []
+    cubes = []
+    for cube in dminfo.get('SPEC', {}).get('HYPERCUBES', {}).values():
+        cubeshape = [int(x) for x in cube['CubeShape']][::-1]
+        tileshape = [int(x) for x in cube['TileShape']][::-1]
+        if len(cubeshape) > 0 and cubeshape[0] > 0:
+            cubes.append((cubeshape, tileshape, int(cube['BucketSize'])))
+    return cubes
+
+
+def _ntiles(start, end, tilelen):
+    """Number of tiles spanned by the (inclusive) index range start:end."""
+    return end // tilelen - start // tilelen + 1
+
+
+def _tileaccess(cubeshape, tileshape, bucketsize, access, blc, trc,
+                nbaseline, limit):
+    """Estimate the optimal cache size and number of tiles read.
+
+    The estimate is done for a single hypercube with shapes in C order
+    (as returned by _tiledcubes) given the access pattern (see
+    table.tunecachesize). The cache size is limited to `limit` bytes.
+    It returns (cachesize, tilesread).
+
+    """
+    nrow = cubeshape[0]
+    ntilerow = _ntiles(0, nrow - 1, tileshape[0])
+    cellshape = cubeshape[1:]
+    cellblc = [0] * len(cellshape)
+    celltrc = [n - 1 for n in cellshape]
+    if len(blc) > 0:
+        cellblc = [min(max(b, 0), n - 1) for b, n in zip(blc, cellshape)]
+    if len(trc) > 0:
+        celltrc = [min(max(t, b), n - 1)
+                   for t, b, n in zip(trc, cellblc, cellshape)]
+    # Number of tiles in a strip of tiles containing the slice in a row.
+    strip = 1
+    for b, t, n in zip(cellblc, celltrc, tileshape[1:]):
+        strip *= _ntiles(b, t, n)
+    maxtiles = max(limit // bucketsize, 1)
+    if access == 'row':
+        # All rows are read in order, so each tile is needed once.
+        if strip <= maxtiles:
+            return (strip * bucketsize, strip * ntilerow)
+        return (maxtiles * bucketsize, strip * nrow)
+    if access == 'channel':
+        # The full cell is read in consecutive slices (of the given length)
+        # and for each slice all rows are read. Unless all tiles fit in the
+        # cache, the tiles are read again for each slice overlapping them.
+        alltiles = ntilerow
+        strip = 1
+        nread = 1
+        for b, t, n, tl in zip(cellblc, celltrc, cellshape, tileshape[1:]):
+            alltiles *= _ntiles(0, n - 1, tl)
+            step = t - b + 1
+            spans = [_ntiles(st, min(st + step, n) - 1, tl)
+                     for st in range(0, n, step)]
+            nread *= sum(spans)
+            strip *= max(spans)
+        if alltiles <= maxtiles:
+            return (alltiles * bucketsize, alltiles)
+        strip = min(strip, maxtiles)
+        return (strip * bucketsize, nread * ntilerow)
+    if access == 'baseline':
+        # The rows are read per baseline; the rows of a baseline are
+        # nbaseline rows apart, thus a tile holds rows of many baselines.
+        # Unless all tiles fit in the cache, a tile is read again for each
+        # baseline having rows in it.
+        if strip * ntilerow <= maxtiles:
+            return (strip * ntilerow * bucketsize, strip * ntilerow)
+        nbl = min(max(nbaseline, 1), tileshape[0], nrow)
+        return (min(strip, maxtiles) * bucketsize, strip * ntilerow * nbl)
+    raise ValueError("access must be 'row', 'channel' or 'baseline'")
+
+
+# Size in bytes of the value types that can be stored in a tiled column.
+_tiled_itemsize = {'boolean': 1, 'bool': 1, 'byte': 1, 'uchar': 1,
+                   'short': 2, 'ushort': 2, 'integer': 4, 'int': 4,
+                   'uint': 4, 'float': 4, 'double': 8, 'int64': 8,
+                   'complex': 8, 'dcomplex': 16}
+
+
+# Numpy dtype in which the bindings return the values of each value type.
+# String and record columns map to object.
+_coldtypes = {'boolean': numpy.bool_, 'bool': numpy.bool_,
+              'uchar': numpy.uint16, 'short': numpy.int16,
+              'integer': numpy.int32, 'int': numpy.int32,
+              'uint': numpy.uint32, 'int64': numpy.int64,
+              'float': numpy.float32, 'double': numpy.float64,
+              'complex': numpy.complex64, 'dcomplex': numpy.complex128}
+
+
+def _coldtype(coldesc):
+    """Get the numpy dtype of the values of a column from its description."""
+    return numpy.dtype(_coldtypes.get(coldesc.get('valueType'), object))
+
+
+def _tileshape(cellshape, nrow, itemsize, access, tilesize,
+               nchanpertile=8):
+    """Advise a tile shape for a column given its access pattern.
+
+    `cellshape` is in C order (thus channel axis first for a MS).
+    The tile shape is returned in Fortran order as used for
+    DEFAULTTILESHAPE, thus the row axis last.
+    For 'row' access a tile contains full cells, for 'channel' access it
+    contains `nchanpertile` channels (the first C axis) of many rows,
+    while for 'baseline' access small tiles are used, because the rows of
+    a baseline are spread over the table.
+
+    """
+    tile = [int(n) for n in cellshape][::-1]
+    if access == 'channel':
+        if len(tile) > 0:
+            tile[-1] = min(tile[-1], nchanpertile)
+    elif access == 'baseline':
+        tilesize = max(tilesize // 32, itemsize)
+    elif access != 'row':
+        raise ValueError("access must be 'row', 'channel' or 'baseline'")
+    # Halve the slowest varying axes until a single row fits in a tile.
+    for axis in reversed(range(len(tile))):
+        while tile[axis] > 1 and numpy.prod(tile) * itemsize > tilesize:
+            tile[axis] = (tile[axis] + 1) // 2
+    nrowtile = max(1, tilesize // int(numpy.prod(tile) * itemsize))
+    return tile + [max(1, min(nrowtile, nrow))]
+
+
+def _daskchunks(shape, tileshape, itemsize, chunkbytes=64*1024*1024):
+    """Get a dask chunk shape being a multiple of the tile shape.
+
+    The shapes are in C order. Starting at the last (fastest varying) axis,
+    the chunk is extended by whole tiles until it contains the full axis or
+    until it exceeds `chunkbytes` bytes.
+
+    """
+    chunk = [max(1, min(int(t), int(n))) for t, n in zip(tileshape, shape)]
+    for axis in reversed(range(len(chunk))):
+        other = int(numpy.prod(chunk)) // chunk[axis] * itemsize
+        ntile = max(1, chunkbytes // max(1, other * chunk[axis]))
+        chunk[axis] = min(int(shape[axis]), chunk[axis] * ntile)
+        if chunk[axis] < shape[axis]:
+            break
+    return tuple(max(1, c) for c in chunk)
+
+
+def _daskarray(name, func, args, shape, chunks, dtype):
+    """Make a lazy dask array whose chunks are read by func(*args, blc, trc).
+
+    blc and trc are the (inclusive) corners of the chunk in C order.
+    `chunks` can be anything accepted by dask.array.
+
+    """
+    import itertools
+    import dask.array as da
+    from dask.base import tokenize
+    chunks = da.core.normalize_chunks(chunks, tuple(shape), dtype=dtype)
+    name = name + '-' + tokenize(func, args, shape, chunks, dtype)
+    starts = [numpy.cumsum((0,) + c[:-1]) for c in chunks]
+    dsk = {}
+    for key in itertools.product(*[range(len(c)) for c in chunks]):
+        blc = [int(starts[i][k]) for i, k in enumerate(key)]
+        trc = [b + chunks[i][k] - 1 for i, (b, k) in enumerate(zip(blc, key))]
+        if any(t < b for b, t in zip(blc, trc)):
+            # Nothing to read for an empty chunk.
+            shape = tuple(t - b + 1 for b, t in zip(blc, trc))
+            dsk[(name,) + key] = (numpy.zeros, shape, dtype)
+        else:
+            dsk[(name,) + key] = (func,) + tuple(args) + (blc, trc)
+    return da.Array(dsk, name, chunks, dtype=dtype)
+
+
 # Convert Python value type to a glish-like type string
 # as expected by the table code.
 def _value_type_name(value):
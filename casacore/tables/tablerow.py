@@ -25,6 +25,8 @@
 #
 # $Id: tablerow.py,v 1.6 2007/08/28 07:22:18 gvandiep Exp $
 
+import numpy
+
 # Make interface to class TableRowProxy available.
 from ._tables import TableRow
 
@@ -38,16 +40,34 @@ from .tablehelper import _check_key_slice
 # Therefore an intermediate _tablerow exists to be used in class table.
 
 class _tablerow(TableRow):
+    # The cell cache of the table (see table.setcellcache).
+    _cache = None
+
     def __init__(self, table, columnnames, exclude=False):
         TableRow.__init__(self, table, columnnames, exclude)
+        if isinstance(columnnames, str):
+            columnnames = [columnnames]
+        self._cachekey = (tuple(columnnames), exclude)
+
+    def _getcache(self):
+        return self._cache
 
     def iswritable(self):
         """Tell if all columns in the row object are writable."""
         return self._iswritable()
 
     def get(self, rownr):
-        """Get the contents of the given row."""
-        return self._get(rownr)
+        """Get the contents of the given row.
+
+        If the cell cache of the table is enabled (see
+        :func:`table.setcellcache`), the row is taken from the cache if
+        possible.
+
+        """
+        cache = self._getcache()
+        if cache is None:
+            return self._get(rownr)
+        return cache.getrow(self._cachekey, rownr, self._get)
 
     def put(self, rownr, value, matchingfields=True):
         """Put the values into the given row.
@@ -61,6 +81,9 @@ class _tablerow(TableRow):
 
         """
         self._put(rownr, value, matchingfields)
+        cache = self._getcache()
+        if cache is not None:
+            cache.clearrow(rownr, value.keys())
 
     def _getitem(self, key, nrows):
         sei = _check_key_slice(key, nrows, 'tablerow')
@@ -136,6 +159,42 @@ class tablerow(_tablerow):
     def __init__(self, table, columnnames=[], exclude=False):
         _tablerow.__init__(self, table, columnnames, exclude)
         self._table = table
+        self._colnames = None
+        self._otherrows = {}
+
+    def _getcache(self):
+        return self._table._cellcache
+
+    def get(self, rownr, out=None):
+        """Get the contents of the given row.
+
+        If the cell cache of the table is enabled (see
+        :func:`table.setcellcache`), the row is taken from the cache if
+        possible.
+
+        `out` can be a dict of numpy arrays (e.g. a dict returned by an
+        earlier `get`) into which the arrays of the columns with the
+        corresponding names are read (see :func:`table.getcell`).
+        The other columns are read as usual. It makes it possible to reuse
+        buffers when iterating over rows.
+
+        """
+        if out is None:
+            return _tablerow.get(self, rownr)
+        if self._colnames is None:
+            self._colnames = list(_tablerow.get(self, rownr).keys())
+        outnames = tuple([name for name in self._colnames
+                          if isinstance(out.get(name), numpy.ndarray)])
+        # Use a row object for the other columns.
+        if outnames not in self._otherrows:
+            names = [name for name in self._colnames if name not in outnames]
+            self._otherrows[outnames] = \
+                _tablerow(self._table, names) if names else None
+        otherrow = self._otherrows[outnames]
+        result = {} if otherrow is None else otherrow.get(rownr)
+        for name in outnames:
+            result[name] = self._table.getcell(name, rownr, out=out[name])
+        return result
 
     def __enter__(self):
         """Function to enter a with block."""
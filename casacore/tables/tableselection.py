@@ -0,0 +1,252 @@
+# tableselection.py: Picklable description of a (selected) table
+# Copyright (C) 2026
+# Associated Universities, Inc. Washington DC, USA.
+#
+# This library is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library; if not, write to the Free Software Foundation,
+# Inc., 675 Massachusetts Ave, Cambridge, MA 02139, USA.
+#
+# Correspondence concerning AIPS++ should be addressed as follows:
+#        Internet email: aips2-request@nrao.edu.
+#        Postal address: AIPS++ Project Office
+#                        National Radio Astronomy Observatory
+#                        520 Edgemont Road
+#                        Charlottesville, VA 22903-2475 USA
+#
+
+import os
+
+import numpy as np
+
+from .table import table
+
+
+def _attachshm(name):
+    """Attach to an existing shared memory block created elsewhere."""
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before python 3.13 an attached block is always registered with
+        # the resource tracker. Worker processes started by multiprocessing
+        # share the tracker of their parent, so the block is only unlinked
+        # once by the process that created it.
+        return shared_memory.SharedMemory(name=name)
+
+
+def _opentable(selection):
+    """Reopen a table from its tableselection (used when unpickling)."""
+    return selection.open()
+
+
+class tableselection:
+    """Picklable description of a table or a selection of a table.
+
+    A reference table (the result of e.g. :func:`table.query`,
+    :func:`table.sort` or :func:`table.selectrows`) only lives in memory
+    and cannot be sent to another process. A `tableselection` describes
+    such a table by the name of its (persistent) parent table, the row
+    numbers in that parent table, and the selected columns.
+    It can be pickled and reopened in another process without executing
+    the query again.
+
+    `table`
+      The table (or selection) to describe. It must be derived from a single
+      table stored on disk; a concatenation or a memory table is not possible.
+    `shared=True`
+      Keep the row numbers in a shared memory block instead of in the object
+      itself. The pickled object then only contains the name of the block,
+      so sending it to N worker processes is O(1) in the number of rows.
+      The process creating the `tableselection` owns the block and has to
+      call :func:`close` (or use a `with` statement) when the workers are
+      done.
+    `startrow`, `nrow`
+      Describe only the given range of rows of `table` (by default all
+      rows). A range of rows of a table stored on disk is kept as the
+      range itself, so it takes no memory (see :func:`table.partition`).
+
+    The described table is reopened by name, so it only sees data stored
+    on disk. A writable table is flushed when the `tableselection` is made
+    (and thus when a table is pickled); later changes have to be flushed
+    before the selection is opened elsewhere.
+
+    A pickled :class:`table` object uses a (non-shared) `tableselection`
+    under the hood, so a selection can also be passed as a normal argument
+    to e.g. `multiprocessing.Pool.map`.
+
+    For example::
+
+      t = table('3c343.MS')
+      t1 = t.query('ANTENNA1 != ANTENNA2', columns='TIME,DATA')
+      with tableselection(t1, shared=True) as sel:
+          pool.map(process, [sel] * nworkers)
+
+      def process(sel):
+          t1 = sel.open()              # same rows and columns as above
+          ...
+
+    """
+
+    def __init__(self, table, shared=False, startrow=0, nrow=-1):
+        parts = table.partnames(True)
+        if len(parts) != 1:
+            raise ValueError("A tableselection cannot be made of a "
+                             "concatenation of tables")
+        parent = parts[0]
+        if not os.path.exists(os.path.join(parent, 'table.dat')):
+            raise ValueError("A tableselection can only be made of a table "
+                             "stored on disk; " + parent + " is not")
+        self._parent = parent
+        self._readonly = not table.iswritable()
+        if not self._readonly:
+            # The table is reopened by name, so changes have to be on disk.
+            table.flush()
+        self._columns = table.colnames()
+        tabnrow = table.nrows()
+        if nrow < 0:
+            nrow = tabnrow - startrow
+        if startrow < 0 or startrow + nrow > tabnrow:
+            raise ValueError("Row range exceeds the number of rows")
+        self._nrow = nrow
+        self._rownrs = None
+        self._rowrange = None
+        self._shmname = None
+        self._shm = None
+        self._owner = False
+        if table.name() == parent and nrow != tabnrow:
+            self._rowrange = (startrow, nrow)
+        elif table.name() != parent:
+            rownrs = np.array(table.rownumbers(), dtype=np.int64)
+            rownrs = rownrs[startrow:startrow + nrow]
+            if shared:
+                from multiprocessing import shared_memory
+                self._shm = shared_memory.SharedMemory(
+                    create=True, size=max(rownrs.nbytes, 1))
+                self._shmname = self._shm.name
+                self._owner = True
+                self._rownrs = np.ndarray(rownrs.shape, dtype=np.int64,
+                                          buffer=self._shm.buf)
+                self._rownrs[:] = rownrs
+            else:
+                self._rownrs = rownrs
+
+    def __del__(self):
+        if getattr(self, '_shm', None) is not None:
+            self.close()
+
+    def __enter__(self):
+        """Function to enter a with block."""
+        return self
+
+    def __exit__(self, type, value, traceback):
+        """Function to exit a with block which releases shared memory."""
+        self.close()
+
+    def __getstate__(self):
+        state = {'parent': self._parent,
+                 'readonly': self._readonly,
+                 'columns': self._columns,
+                 'nrow': self._nrow,
+                 'rowrange': self._rowrange,
+                 'shmname': self._shmname,
+                 'rownrs': None}
+        if self._shmname is None:
+            state['rownrs'] = self._rownrs
+        return state
+
+    def __setstate__(self, state):
+        self._parent = state['parent']
+        self._readonly = state['readonly']
+        self._columns = state['columns']
+        self._nrow = state['nrow']
+        self._rowrange = state.get('rowrange')
+        self._shmname = state['shmname']
+        self._rownrs = state['rownrs']
+        self._shm = None
+        self._owner = False
+
+    def __len__(self):
+        """Return the number of rows in the selection."""
+        return self._nrow
+
+    def parent(self):
+        """Return the name of the table the selection is made from."""
+        return self._parent
+
+    def colnames(self):
+        """Return the names of the selected columns."""
+        return list(self._columns)
+
+    def rowrange(self):
+        """Return (startrow, nrow) if the selection is a range of rows.
+
+        None is returned if the selection is not described as a row range.
+
+        """
+        return self._rowrange
+
+    def rownumbers(self):
+        """Return the row numbers in the parent table as a numpy array.
+
+        None is returned if the selection contains all rows of the parent.
+        If the row numbers are kept in shared memory, a copy is returned.
+        An object unpickled in another process copies them the first time
+        and detaches from the shared memory immediately.
+
+        """
+        if self._rowrange is not None:
+            return np.arange(self._rowrange[0],
+                             self._rowrange[0] + self._rowrange[1])
+        if self._rownrs is None and self._shmname is not None:
+            shm = _attachshm(self._shmname)
+            view = np.ndarray((self._nrow,), dtype=np.int64, buffer=shm.buf)
+            self._rownrs = view.copy()
+            del view
+            shm.close()
+        if self._owner:
+            return self._rownrs.copy()
+        return self._rownrs
+
+    def open(self, readonly=None, ack=False):
+        """Open the described table and return a table object.
+
+        The parent table is opened and the rows and columns are selected
+        again without executing the original query. By default the table
+        is opened readonly if the original table was readonly.
+
+        """
+        if readonly is None:
+            readonly = self._readonly
+        t = table(self._parent, readonly=readonly, ack=ack)
+        rownrs = self.rownumbers()
+        if rownrs is not None:
+            t = t.selectrows(rownrs)
+        if self._columns != t.colnames():
+            t = t.select(','.join(self._columns))
+        return t
+
+    def close(self):
+        """Release the shared memory holding the row numbers.
+
+        The shared memory block is removed if this object created it.
+        Thereafter objects unpickled from it cannot access the row numbers
+        anymore unless they did so before.
+
+        """
+        if self._shm is not None:
+            self._rownrs = None
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+            self._shm = None
+            self._owner = False
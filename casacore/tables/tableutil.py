@@ -38,7 +38,8 @@ def tablefromascii(tablename, asciifile,
                    commentmarker='',
                    firstline=1, lastline=-1,
                    readonly=True,
-                   lockoptions='default', ack=True):
+                   lockoptions='default', ack=True,
+                   fast=False, nproc=1):
     """Create a table from an ASCII file.
 
     Create a table from a file in ASCII format. Columnar data as well as
@@ -215,6 +216,14 @@ def tablefromascii(tablename, asciifile,
     The number of rows is determined by the number of lines read from the data
     file.
 
+    If `fast=True`, a vectorised reader is used for large files with plain
+    numeric data. The file is memory-mapped and split into line-aligned
+    chunks, which are parsed by numpy in `nproc` processes and written
+    into the table using bulk puts. It can only be used if the columns are
+    of type S, I, R, D, X, or DX with a fixed shape, if the header does not
+    contain keywords, if all values are given, and if no `commentmarker`,
+    `firstline` or `lastline` is given. Otherwise the normal reader is used.
+
     """
     import os.path
     filename = os.path.expandvars(asciifile)
@@ -228,16 +237,168 @@ def tablefromascii(tablename, asciifile,
         if not os.path.exists(filename):
             s = "File '%s' not found" % (filename)
             raise IOError(s)
-    tab = table(asciifile, headerfile, tablename, autoheader, autoshape,
-                sep, commentmarker, firstline, lastline,
-                _columnnames=columnnames, _datatypes=datatypes, _oper=1)
-    print('Input format: [' + tab._getasciiformat() + ']')
+    tab = None
+    if fast and commentmarker == '' and firstline <= 1 and lastline < 0:
+        tab = _fastfromascii(tablename, asciifile, headerfile, autoheader,
+                             autoshape, columnnames, datatypes, sep, nproc)
+    if tab is None:
+        tab = table(asciifile, headerfile, tablename, autoheader, autoshape,
+                    sep, commentmarker, firstline, lastline,
+                    _columnnames=columnnames, _datatypes=datatypes, _oper=1)
+        print('Input format: [' + tab._getasciiformat() + ']')
     # Close table and reopen it in correct way.
     tab = 0
     return table(tablename, readonly=readonly, lockoptions=lockoptions,
                  ack=ack)
 
 
+# The value types and number of values per element of the ASCII types
+# supported by the fast ASCII reader.
+_fastasciitypes = {'S': ('short', 'int16', 1), 'I': ('int', 'int32', 1),
+                   'R': ('float', 'float32', 1),
+                   'D': ('double', 'float64', 1),
+                   'X': ('complex', 'complex64', 2),
+                   'DX': ('dcomplex', 'complex128', 2)}
+
+
+def _parseasciichunk(filename, start, end, sep, nvalues):
+    """Parse a line-aligned chunk of an ASCII file into a 2-dim array."""
+    import mmap
+    import numpy as np
+    with open(filename, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[start:end]
+    if sep.strip() != '':
+        text = text.replace(sep.strip().encode(), b' ')
+    values = np.fromstring(text, sep=' ')
+    nline = text.count(b'\n')
+    if len(text.strip()) > 0 and not text.endswith(b'\n'):
+        nline += 1
+    # Count the values (starts of words) per line.
+    buf = np.frombuffer(text, np.uint8)
+    newline = buf == ord('\n')
+    space = newline | (buf == ord(' ')) | (buf == ord('\t')) | \
+        (buf == ord('\r'))
+    wordstart = ~space
+    wordstart[1:] &= space[:-1]
+    counts = np.bincount(np.cumsum(newline)[wordstart], minlength=nline)
+    if values.size != nline * nvalues or (counts != nvalues).any():
+        raise ValueError('Line does not contain ' + str(nvalues) + ' values')
+    return values.reshape(nline, nvalues)
+
+
+def _fastfromascii(tablename, asciifile, headerfile, autoheader, autoshape,
+                   columnnames, datatypes, sep, nproc):
+    """Create a table from plain numeric ASCII data (None if not possible).
+
+    The columns are derived like the C++ reader does, whereafter the data
+    are parsed in line-aligned chunks of the memory-mapped file.
+    """
+    import mmap
+    import os
+    import re
+    import numpy as np
+    from concurrent.futures import ProcessPoolExecutor
+    filename = os.path.expanduser(os.path.expandvars(asciifile))
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with mm:
+        datastart = 0
+        if len(columnnames) > 0 and len(datatypes) > 0:
+            names = list(columnnames)
+            types = list(datatypes)
+        elif autoheader:
+            if autoshape != []:
+                return None
+            line = mm[:mm.find(b'\n')].decode()
+            values = line.replace(sep.strip() or ' ', ' ').split()
+            if not all(re.match(r'^[+-]?[0-9.]+([eE][+-]?[0-9]+)?$', v)
+                       for v in values):
+                return None
+            names = ['Column' + str(i + 1) for i in range(len(values))]
+            types = ['I' if re.match(r'^[+-]?[0-9]+$', v) else 'D'
+                     for v in values]
+        else:
+            if headerfile != '':
+                hdrname = os.path.expanduser(os.path.expandvars(headerfile))
+                with open(hdrname, 'rb') as f:
+                    lines = f.read().split(b'\n')[:2]
+            else:
+                end1 = mm.find(b'\n')
+                end2 = mm.find(b'\n', end1 + 1)
+                if end1 < 0 or end2 < 0:
+                    return None
+                lines = [mm[:end1], mm[end1 + 1:end2]]
+                datastart = end2 + 1
+            lines = [line.decode().strip() for line in lines]
+            if len(lines) < 2 or lines[0].startswith('.key'):
+                return None
+            names = [name.strip('\'"') for name in
+                     lines[0].replace(sep.strip() or ' ', ' ').split()]
+            types = lines[1].replace(sep.strip() or ' ', ' ').split()
+        # Determine the value type and shape of the columns.
+        coldescs = []
+        columns = []
+        nvalues = 0
+        for name, dtype in zip(names, types):
+            match = re.match(r'^([A-Z]+)([0-9,]*)$', dtype)
+            if match is None or match.group(1) not in _fastasciitypes:
+                return None
+            valtype, nptype, nval = _fastasciitypes[match.group(1)]
+            shape = [int(x) for x in match.group(2).split(',') if x != '']
+            if 0 in shape:
+                return None
+            value = np.zeros(1, nptype)[0]
+            if match.group(2) == '':
+                coldescs.append(makescacoldesc(name, value, valuetype=valtype))
+            else:
+                coldescs.append(makearrcoldesc(name, value, shape=shape[::-1],
+                                               valuetype=valtype))
+            nelem = int(np.prod(shape)) if shape else 1
+            columns.append((name, nvalues, nelem * nval, nval, shape[::-1]))
+            nvalues += nelem * nval
+        if nvalues == 0 or len(columns) != len(names):
+            return None
+        # Split the data into line-aligned chunks.
+        size = len(mm)
+        nchunk = max(1, nproc) * 4
+        bounds = [datastart]
+        for i in range(1, nchunk):
+            pos = mm.find(b'\n', max(bounds[-1], datastart +
+                                      (size - datastart) * i // nchunk))
+            if pos < 0:
+                break
+            bounds.append(pos + 1)
+        bounds.append(size)
+    bounds = sorted(set(bounds))
+    args = [[filename] * (len(bounds) - 1), bounds[:-1], bounds[1:],
+            [sep] * (len(bounds) - 1), [nvalues] * (len(bounds) - 1)]
+    try:
+        if nproc > 1:
+            with ProcessPoolExecutor(nproc) as pool:
+                chunks = list(pool.map(_parseasciichunk, *args))
+        else:
+            chunks = list(map(_parseasciichunk, *args))
+    except ValueError:
+        return None
+    print('Input format: [' + ', '.join(
+        [name + '=' + dtype for name, dtype in zip(names, types)]) + ']')
+    nrow = sum([len(chunk) for chunk in chunks])
+    tab = table(tablename, maketabdesc(coldescs), nrow=nrow, ack=False)
+    row = 0
+    for chunk in chunks:
+        for name, first, nval, ncomp, shape in columns:
+            values = chunk[:, first:first + nval]
+            if ncomp == 2:
+                values = values[:, 0::2] + 1j * values[:, 1::2]
+            tab.putcol(name, values.reshape([len(chunk)] + shape), row,
+                       len(chunk))
+        row += len(chunk)
+    return tab
+
+
 # Create a description of a scalar column
 def makescacoldesc(columnname, value,
                    datamanagertype='',
@@ -675,7 +836,8 @@ def tableiswritable(tablename):
 
 
 def tablecopy(tablename, newtablename, deep=False, valuecopy=False, dminfo={},
-              endian='aipsrc', memorytable=False, copynorows=False):
+              endian='aipsrc', memorytable=False, copynorows=False,
+              chunkrows=0, nproc=1, progress=False):
     """Copy a table.
 
     It is the same as :func:`table.copy`, but without the need to open
@@ -685,7 +847,148 @@ def tablecopy(tablename, newtablename, deep=False, valuecopy=False, dminfo={},
     t = table(tablename, ack=False)
     return t.copy(newtablename, deep=deep, valuecopy=valuecopy,
                   dminfo=dminfo, endian=endian, memorytable=memorytable,
-                  copynorows=copynorows)
+                  copynorows=copynorows, chunkrows=chunkrows, nproc=nproc,
+                  progress=progress)
+
+
+def retile(tablename, newtablename, columns=[], access='row',
+           tilesize=1048576, benchmark=False, ack=True):
+    """Copy a table while changing the tile shape of array columns.
+
+    The tile shape of a column stored with a tiled storage manager has a
+    large impact on the I/O performance. Which tile shape is best, depends
+    on the way the data are accessed. This function chooses a tile shape
+    for each given column and makes a deep copy of the table (including
+    its subtables) where these columns are stored with a TiledShapeStMan
+    using the new tile shape. The other columns keep their data managers.
+    The new table is returned as a :class:`table` object.
+
+    `columns`
+      The (array) columns to retile. By default all numeric array columns
+      are retiled.
+    `access`
+      The intended access pattern:
+
+      - 'row' reads entire cells in row order (e.g. getcol in chunks).
+        A tile contains full cells of as many rows as fit in `tilesize`.
+      - 'channel' reads the full column in slices of a few channels
+        (e.g. getcolslice). A tile contains 8 channels of many rows, where
+        the channel axis is the first axis of the cell (in C order).
+      - 'baseline' reads the rows per baseline. Small tiles (of
+        `tilesize`/32 bytes) containing full cells are used, because the
+        rows of a baseline are spread over the table.
+    `tilesize`
+      The maximum size of a tile in bytes.
+    `benchmark`
+      If True, the read throughput of each retiled column is measured for
+      the access pattern in the original and the new table and reported.
+      Note that the results are influenced by the file system cache.
+
+    For example::
+
+      t = retile('3c343.MS', '3c343_chan.MS', ['DATA', 'FLAG'], 'channel',
+                 benchmark=True)
+
+    """
+    t = table(tablename, ack=False)
+    dminfo, columns = _retiledminfo(t, columns, access, tilesize, t.nrows(),
+                                    ack)
+    tnew = t.copy(newtablename, deep=True, valuecopy=True, dminfo=dminfo)
+    if benchmark:
+        for col in columns:
+            rate = _readthroughput(t, col, access)
+            ratenew = _readthroughput(tnew, col, access)
+            if rate is None or ratenew is None:
+                print('Column %s has no defined cells; not measured' % col)
+                continue
+            print('Column %s %s access: %.1f MB/s before, %.1f MB/s after' %
+                  (col, access, rate / 1e6, ratenew / 1e6))
+    return tnew
+
+
+def _retiledminfo(t, columns, access, tilesize, nrow, ack):
+    """Make the dminfo of table t where the columns get a new tile shape.
+
+    The tile shapes are based on the given number of rows. It returns the
+    dminfo and the list of retiled columns. A column without a fixed shape
+    and without any defined cell keeps its data manager.
+
+    """
+    from .tablehelper import _tiled_itemsize, _tileshape
+    if isinstance(columns, str):
+        columns = [columns]
+    if len(columns) == 0:
+        columns = [col for col in t.colnames()
+                   if not t.isscalarcol(col) and
+                   t.coldatatype(col) in _tiled_itemsize]
+    cellshapes = {}
+    for col in columns:
+        if t.isscalarcol(col) or t.coldatatype(col) not in _tiled_itemsize:
+            raise ValueError('Column ' + col + ' is not a numeric array '
+                             'column, so it cannot be tiled')
+        cellshape = t.getcoldesc(col).get('shape', [])
+        if len(cellshape) == 0:
+            # Use the shape of the first defined cell.
+            tdef = t.query('isdefined(' + col + ')', limit=1, columns=col)
+            if tdef.nrows() == 0:
+                continue
+            cellshape = list(tdef.getcell(col, 0).shape)
+        cellshapes[col] = cellshape
+    columns = [col for col in columns if col in cellshapes]
+    # Remove the columns from their current data managers.
+    dms = []
+    for dm in t.getdminfo().values():
+        dm = dict(dm)
+        dm['COLUMNS'] = [col for col in dm['COLUMNS'] if col not in columns]
+        if len(dm['COLUMNS']) > 0:
+            dms.append(dm)
+    for col in columns:
+        tileshape = _tileshape(cellshapes[col], nrow,
+                               _tiled_itemsize[t.coldatatype(col)],
+                               access, tilesize)
+        dms.append({'TYPE': 'TiledShapeStMan',
+                    'NAME': 'Tiled_' + col,
+                    'SPEC': {'DEFAULTTILESHAPE': tileshape},
+                    'COLUMNS': [col]})
+        if ack:
+            print('Column', col, 'gets tile shape', tileshape)
+    dminfo = {'*%d' % (i + 1): dm for i, dm in enumerate(dms)}
+    return dminfo, columns
+
+
+def _readthroughput(t, columnname, access, nchanperread=8):
+    """Measure the read throughput (bytes/sec) of a column.
+
+    Only the rows with a defined cell are read. None is returned if the
+    column has no defined cell.
+
+    """
+    import time
+    import numpy as np
+    t = t.query('isdefined(' + columnname + ')')
+    nrow = t.nrows()
+    if nrow == 0:
+        return None
+    nbytes = 0
+    start = time.time()
+    if access == 'channel':
+        shape = t.getcell(columnname, 0).shape
+        for st in range(0, shape[0], nchanperread):
+            blc = [st] + [0] * (len(shape) - 1)
+            trc = [min(st + nchanperread, shape[0]) - 1] + \
+                  [n - 1 for n in shape[1:]]
+            nbytes += t.getcolslice(columnname, blc, trc).nbytes
+    elif access == 'baseline':
+        bl = t.getcol('ANTENNA1') * 65536 + t.getcol('ANTENNA2')
+        rownrs = np.argsort(bl, kind='stable')
+        ends = np.flatnonzero(np.diff(bl[rownrs])) + 1
+        for rows in np.split(rownrs, ends):
+            nbytes += t.selectrows(rows).getcol(columnname).nbytes
+    else:
+        nrowchunk = max(1, 2**26 // max(1, t.getcell(columnname, 0).nbytes))
+        for st in range(0, nrow, nrowchunk):
+            nbytes += t.getcol(columnname, st, nrowchunk).nbytes
+    return nbytes / max(time.time() - start, 1e-9)
 
 
 def tablerename(tablename, newtablename):
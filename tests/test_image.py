@@ -8,6 +8,11 @@ try:
     import numpy.ma as nma
 except ImportError:
     import numpy.core.ma as nma
+try:
+    import dask.array
+    have_dask = True
+except ImportError:
+    have_dask = False
 
 
 class TestImage(unittest.TestCase):
@@ -76,6 +81,35 @@ class TestImage(unittest.TestCase):
         numpy.testing.assert_equal(im1.getdata(), marr.data)
         numpy.testing.assert_equal(im1.getmask(), marr.mask)
 
+    def test_getdata_out(self):
+        """Get data and mask into existing arrays."""
+        marr = nma.masked_array(numpy.array([[1., 2, 3], [4, 5, 6]]),
+                mask=[[False, True, False], [False, False, True]])
+        im1 = image("testimg", values=marr)
+        buf = numpy.zeros((2, 6), numpy.float32)
+        res = im1.getdata(out=buf[:, ::2])
+        numpy.testing.assert_equal(buf[:, ::2], marr.data)
+        self.assertIs(res.base, buf)
+        mask = numpy.zeros((2, 3), bool)
+        self.assertIs(im1.getmask(out=mask), mask)
+        numpy.testing.assert_equal(mask, marr.mask)
+
+    @unittest.skipIf(not have_dask, "dask is not available")
+    def test_to_dask(self):
+        """Get the image data as a dask array."""
+        data = numpy.arange(24, dtype=numpy.float32).reshape(2, 3, 4)
+        im = image("testimg", shape=[2, 3, 4])
+        im.put(data)
+        arr = im.to_dask()
+        self.assertEqual(arr.shape, (2, 3, 4))
+        self.assertEqual(arr.dtype, numpy.float32)
+        numpy.testing.assert_equal(arr.compute(), data)
+        arr = im.to_dask(chunks=(1, 2, -1))
+        self.assertEqual(arr.chunks, ((1, 1), (2, 1), (4,)))
+        numpy.testing.assert_equal(arr.sum(axis=0).compute(), data.sum(0))
+        im1 = image("", shape=[2, 3])
+        self.assertRaises(ValueError, im1.to_dask)
+
     def test_lock(self):
         """Test lock."""
         im = image("testimg", shape=[2, 3])
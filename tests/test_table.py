@@ -8,9 +8,25 @@ from casacore.tables import (makescacoldesc, makearrcoldesc, table,
                              addDerivedMSCal, removeImagingColumns,
                              addImagingColumns, complete_ms_desc,
                              required_ms_desc, tabledefinehypercolumn,
-                             default_ms, default_ms_subtable, makedminfo)
+                             default_ms, default_ms_subtable, makedminfo,
+                             tableselection, retile, msregularize,
+                             msaverage, baseline_index, compute_uvw,
+                             materializeDerivedMSCal, flagstats,
+                             mssummary, to_xarray)
 import numpy as np
 import collections
+import os
+import pickle
+try:
+    import dask.array
+    have_dask = True
+except ImportError:
+    have_dask = False
+try:
+    import xarray
+    have_xarray = have_dask
+except ImportError:
+    have_xarray = False
 
 
 subtables = ("ANTENNA", "DATA_DESCRIPTION", "DOPPLER",
@@ -509,7 +525,371 @@ class TestTable(unittest.TestCase):
 
         # TODO
         # msconcat with concatTime=False
-        # msregularize
+
+    def test_msregularize(self):
+        """Add missing baselines to an MS."""
+        datacoldesc = makearrcoldesc("DATA", 0j, ndim=2, shape=[2, 4])
+        ms = default_ms("ttable.py_tmp.ms1", maketabdesc(datacoldesc))
+        # 3 times, 3 baselines, 2 bands; 4 rows are missing.
+        time, ddid, ant1, ant2 = np.array(
+            [(tm, dd, a1, a2) for tm in (1., 2., 3.) for dd in (0, 1)
+             for a1, a2 in ((0, 1), (0, 2), (1, 2))]).T
+        keep = np.ones(len(time), bool)
+        keep[[1, 6, 7, 17]] = False
+        ms.addrows(keep.sum())
+        ms.putcol("TIME", time[keep])
+        ms.putcol("DATA_DESC_ID", ddid[keep].astype(int))
+        ms.putcol("ANTENNA1", ant1[keep].astype(int))
+        ms.putcol("ANTENNA2", ant2[keep].astype(int))
+        ms.putcol("DATA", np.ones((keep.sum(), 2, 4), complex))
+        ms.putcol("FLAG", np.zeros((keep.sum(), 2, 4), bool))
+        ms.close()
+        msregularize("ttable.py_tmp.ms1", "ttable.py_tmp.ms2")
+        t = table("ttable.py_tmp.ms2", ack=False)
+        self.assertEqual(t.nrows(), 18)
+        np.testing.assert_array_equal(t.getcol("TIME"), time)
+        np.testing.assert_array_equal(t.getcol("DATA_DESC_ID"), ddid)
+        np.testing.assert_array_equal(t.getcol("ANTENNA1"), ant1)
+        np.testing.assert_array_equal(t.getcol("ANTENNA2"), ant2)
+        np.testing.assert_array_equal(t.getcol("FLAG").all(axis=(1, 2)),
+                                      ~keep)
+        t.close()
+        for name in ("ms2", "ms2_adds", "ms2_add", "ms1"):
+            tabledelete("ttable.py_tmp." + name)
+
+    def test_msconcat_physical(self):
+        """Physically concatenate MSs."""
+        datacoldesc = makearrcoldesc("DATA", 0j, ndim=2, shape=[4, 2])
+        names = ["ttable.py_tmp.ms1", "ttable.py_tmp.ms2"]
+        for i, name in enumerate(names):
+            ms = default_ms(name, maketabdesc(datacoldesc))
+            ms.addrows(3)
+            ms.putcol("TIME", np.arange(3.) + 0.5 * i)
+            ms.putcol("DATA", np.full((3, 4, 2), i + 1, complex))
+            ms.close()
+            for sub in ("SPECTRAL_WINDOW", "DATA_DESCRIPTION"):
+                tsub = table(name + "/" + sub, readonly=False, ack=False)
+                tsub.addrows()
+                tsub.close()
+        msconcat(names, "ttable.py_tmp.ms3", physical=True, access='channel')
+        self.assertFalse(tableexists("ttable.py_tmp.ms3_VIRTUAL"))
+        self.assertFalse(tableexists("ttable.py_tmp.ms3_VIRTUAL_CONCAT"))
+        t = table("ttable.py_tmp.ms3", ack=False)
+        self.assertEqual(t.getdminfo("DATA")["TYPE"], "TiledShapeStMan")
+        np.testing.assert_array_equal(t.getcol("TIME"),
+                                      [0, 0.5, 1, 1.5, 2, 2.5])
+        np.testing.assert_array_equal(t.getcol("DATA_DESC_ID"),
+                                      [0, 1, 0, 1, 0, 1])
+        np.testing.assert_array_equal(t.getcol("DATA")[:, 0, 0],
+                                      [1, 2, 1, 2, 1, 2])
+        tdd = table(t.getkeyword("DATA_DESCRIPTION"), ack=False)
+        np.testing.assert_array_equal(tdd.getcol("SPECTRAL_WINDOW_ID"),
+                                      [0, 1])
+        tdd.close()
+        t.close()
+        for name in names + ["ttable.py_tmp.ms3"]:
+            tabledelete(name)
+
+    def test_msaverage(self):
+        """Average an MS in time and frequency."""
+        datacoldesc = makearrcoldesc("DATA", 0j, shape=[6, 2])
+        ms = default_ms("ttable.py_tmp.ms1", maketabdesc(datacoldesc))
+        ms.addrows(12)
+        ms.putcol("TIME", np.repeat([5., 15, 25, 35], 3))
+        ms.putcol("INTERVAL", np.full(12, 10.))
+        ms.putcol("ANTENNA1", np.tile([0, 0, 1], 4))
+        ms.putcol("ANTENNA2", np.tile([1, 2, 2], 4))
+        data = np.arange(144).reshape(12, 6, 2) + 0j
+        ms.putcol("DATA", data)
+        flag = np.zeros((12, 6, 2), bool)
+        flag[0, :2, 0] = True
+        flag[3, 1, 0] = True
+        flag[[1, 4], 4:, :] = True
+        ms.putcol("FLAG", flag)
+        ms.putcol("WEIGHT", np.ones((12, 2)))
+        ms.close()
+        spw = table("ttable.py_tmp.ms1/SPECTRAL_WINDOW", readonly=False,
+                    ack=False)
+        spw.addrows()
+        spw.putcell("NUM_CHAN", 0, 6)
+        spw.putcell("CHAN_FREQ", 0, np.arange(6) * 1e6 + 1e8)
+        spw.putcell("CHAN_WIDTH", 0, np.full(6, 1e6))
+        spw.close()
+        msaverage("ttable.py_tmp.ms1", "ttable.py_tmp.ms2", timebin=2,
+                  chanbin=4, chunkrows=3)
+        t = table("ttable.py_tmp.ms2", ack=False)
+        self.assertEqual(t.nrows(), 6)
+        np.testing.assert_array_equal(t.getcol("TIME"), [10] * 3 + [30] * 3)
+        np.testing.assert_array_equal(t.getcol("INTERVAL"), [20] * 6)
+        np.testing.assert_array_equal(t.getcol("ANTENNA2"), [1, 2, 2] * 2)
+        avg = t.getcol("DATA")
+        self.assertEqual(avg.shape, (6, 2, 2))
+        sel = data[[0, 3], :4]
+        unflagged = ~flag[[0, 3], :4]
+        np.testing.assert_allclose(avg[0, 0], (sel * unflagged).sum((0, 1)) /
+                                   unflagged.sum((0, 1)))
+        np.testing.assert_array_equal(t.getcol("FLAG")[1, 1], [True, True])
+        np.testing.assert_allclose(avg[1, 1], data[[1, 4], 4:].mean((0, 1)))
+        np.testing.assert_allclose(t.getcol("WEIGHT")[0], [4.5, 6])
+        tspw = table(t.getkeyword("SPECTRAL_WINDOW"), ack=False)
+        self.assertEqual(tspw.getcell("NUM_CHAN", 0), 2)
+        np.testing.assert_allclose(tspw.getcell("CHAN_FREQ", 0),
+                                   [101.5e6, 104.5e6])
+        np.testing.assert_allclose(tspw.getcell("CHAN_WIDTH", 0), [4e6, 2e6])
+        tspw.close()
+        t.close()
+        tabledelete("ttable.py_tmp.ms1")
+        tabledelete("ttable.py_tmp.ms2")
+
+    def test_msaverage_fields(self):
+        """Average an MS with interleaved fields in time."""
+        datacoldesc = makearrcoldesc("DATA", 0j, shape=[1, 1])
+        ms = default_ms("ttable.py_tmp.ms1", maketabdesc(datacoldesc))
+        ms.addrows(8)
+        ms.putcol("TIME", np.arange(8.))
+        ms.putcol("INTERVAL", np.ones(8))
+        ms.putcol("ANTENNA2", np.ones(8, int))
+        ms.putcol("FIELD_ID", [0, 1] * 4)
+        ms.putcol("DATA", np.array([1, 100, 2, 200, 3, 300, 4, 400],
+                                   complex).reshape(8, 1, 1))
+        ms.putcol("FLAG", np.zeros((8, 1, 1), bool))
+        ms.putcol("WEIGHT", np.ones((8, 1)))
+        ms.close()
+        msaverage("ttable.py_tmp.ms1", "ttable.py_tmp.ms2", timebin=2)
+        t = table("ttable.py_tmp.ms2", ack=False)
+        self.assertEqual(t.nrows(), 4)
+        np.testing.assert_array_equal(t.getcol("FIELD_ID"), [0, 1, 0, 1])
+        np.testing.assert_array_equal(t.getcol("TIME"), [1, 2, 5, 6])
+        np.testing.assert_allclose(t.getcol("DATA")[:, 0, 0],
+                                   [1.5, 150, 3.5, 350])
+        t.close()
+        tabledelete("ttable.py_tmp.ms1")
+        tabledelete("ttable.py_tmp.ms2")
+
+    def test_baseline_index(self):
+        """Index the baselines in an MS."""
+        ms = default_ms("ttable.py_tmp.ms1")
+        ms.addrows(12)
+        ms.putcol("TIME", np.repeat([5., 15, 25, 35], 3))
+        ms.putcol("ANTENNA1", np.tile([0, 0, 1], 4))
+        ms.putcol("ANTENNA2", np.tile([1, 2, 2], 4))
+        ms.flush()
+        bli = baseline_index(ms, cachefile="ttable.py_tmp.npz")
+        self.assertEqual(len(bli), 3)
+        np.testing.assert_array_equal(bli.baselines(),
+                                      [[0, 1], [0, 2], [1, 2]])
+        np.testing.assert_array_equal(bli.rownumbers(0, 2), [1, 4, 7, 10])
+        self.assertEqual(len(bli.rownumbers(2, 3)), 0)
+        res = bli.getbaseline(1, 2, ["TIME", "ANTENNA1"])
+        np.testing.assert_array_equal(res["TIME"], [5, 15, 25, 35])
+        np.testing.assert_array_equal(res["ANTENNA1"], [1, 1, 1, 1])
+        self.assertTrue(os.path.exists("ttable.py_tmp.npz"))
+        # The stored index is used again, unless the antennas changed.
+        bli = baseline_index("ttable.py_tmp.ms1",
+                             cachefile="ttable.py_tmp.npz")
+        np.testing.assert_array_equal(bli.rownumbers(0, 1), [0, 3, 6, 9])
+        ms.putcell("ANTENNA2", 0, 2)
+        bli = baseline_index(ms, cachefile="ttable.py_tmp.npz")
+        np.testing.assert_array_equal(bli.rownumbers(0, 1), [3, 6, 9])
+        ms.putcell("ANTENNA2", 0, 1)
+        bli = baseline_index(ms)
+        os.remove("ttable.py_tmp.npz")
+        t = bli.rewrite("ttable.py_tmp.ms2")
+        np.testing.assert_array_equal(t.getcol("ANTENNA2"),
+                                      [1] * 4 + [2] * 8)
+        t.close()
+        ms.close()
+        tabledelete("ttable.py_tmp.ms1")
+        tabledelete("ttable.py_tmp.ms2")
+
+    def test_compute_uvw(self):
+        """Compute UVW coordinates per time and antenna."""
+        ms = default_ms("ttable.py_tmp.ms1")
+        ms.addrows(12)
+        ms.putcol("TIME", np.repeat([5., 15, 25, 35], 3) + 4.8e9)
+        ms.putcol("ANTENNA1", np.tile([0, 0, 1], 4))
+        ms.putcol("ANTENNA2", np.tile([1, 2, 2], 4))
+        ms.close()
+        ant = table("ttable.py_tmp.ms1/ANTENNA", readonly=False, ack=False)
+        ant.addrows(3)
+        ant.putcol("POSITION", np.array([[3826577.1, 461022.9, 5064892.7],
+                                         [3826677.1, 461022.9, 5064892.7],
+                                         [3826577.1, 461322.9, 5064992.7]]))
+        ant.close()
+        fld = table("ttable.py_tmp.ms1/FIELD", readonly=False, ack=False)
+        fld.addrows()
+        for col in ("PHASE_DIR", "DELAY_DIR", "REFERENCE_DIR"):
+            fld.putcell(col, 0, np.array([[0.5, 0.8]]))
+        fld.close()
+        addDerivedMSCal("ttable.py_tmp.ms1")
+        compute_uvw("ttable.py_tmp.ms1", nproc=2)
+        t = table("ttable.py_tmp.ms1", ack=False)
+        np.testing.assert_allclose(t.getcol("UVW"), t.getcol("UVW_J2000"),
+                                   atol=1e-6)
+        t.close()
+        tabledelete("ttable.py_tmp.ms1")
+
+    def test_materializeDerivedMSCal(self):
+        """Store the DerivedMSCal columns."""
+        ms = default_ms("ttable.py_tmp.ms1")
+        ms.addrows(12)
+        ms.putcol("TIME", np.repeat([5., 15, 25, 35], 3) + 4.8e9)
+        ms.putcol("ANTENNA1", np.tile([0, 0, 1], 4))
+        ms.putcol("ANTENNA2", np.tile([1, 2, 2], 4))
+        ms.close()
+        ant = table("ttable.py_tmp.ms1/ANTENNA", readonly=False, ack=False)
+        ant.addrows(3)
+        ant.putcol("POSITION", np.array([[3826577.1, 461022.9, 5064892.7],
+                                         [3826677.1, 461022.9, 5064892.7],
+                                         [3826577.1, 461322.9, 5064992.7]]))
+        ant.close()
+        fld = table("ttable.py_tmp.ms1/FIELD", readonly=False, ack=False)
+        fld.addrows()
+        for col in ("PHASE_DIR", "DELAY_DIR", "REFERENCE_DIR"):
+            fld.putcell(col, 0, np.array([[0.5, 0.8]]))
+        fld.close()
+        addDerivedMSCal("ttable.py_tmp.ms1")
+        t = table("ttable.py_tmp.ms1", ack=False)
+        columns = ["HA", "HA1", "PA2", "LAST1", "AZEL2", "UVW_J2000"]
+        expected = dict((col, t.getcol(col)) for col in columns)
+        t.close()
+        materializeDerivedMSCal("ttable.py_tmp.ms1", columns)
+        t = table("ttable.py_tmp.ms1", ack=False)
+        dmtypes = [dm["TYPE"] for dm in t.getdminfo().values()]
+        self.assertNotIn("DerivedMSCal", dmtypes)
+        self.assertNotIn("PA1", t.colnames())
+        for col in columns:
+            np.testing.assert_allclose(t.getcol(col), expected[col],
+                                       atol=1e-6)
+        self.assertEqual(t.getcolkeyword("HA", "QuantumUnits"), ["rad"])
+        t.close()
+        tabledelete("ttable.py_tmp.ms1")
+
+    def test_flagstats(self):
+        """Get flag statistics of an MS."""
+        ms = default_ms("ttable.py_tmp.ms1")
+        ms.addrows(12)
+        ant1 = np.tile([0, 0, 1], 4)
+        ddid = np.repeat([0, 1, 1, 0], 3)
+        ms.putcol("ANTENNA1", ant1)
+        ms.putcol("DATA_DESC_ID", ddid)
+        flags = []
+        for rownr in range(12):
+            flag = np.zeros((4 if ddid[rownr] == 0 else 3, 2), bool)
+            flag[:rownr % 3, rownr % 2] = True
+            ms.putcell("FLAG", rownr, flag)
+            flags.append(flag)
+        ms.putcell("FLAG_ROW", 5, True)
+        flags[5][:] = True
+        stats = flagstats(ms, by=["ANTENNA1", "DATA_DESC_ID"], chunkrows=5,
+                          nthreads=2)
+        self.assertEqual(stats["keys"].tolist(),
+                         [[0, 0], [0, 1], [1, 0], [1, 1]])
+        for i, key in enumerate(stats["keys"]):
+            rows = np.flatnonzero((ant1 == key[0]) & (ddid == key[1]))
+            expected = np.sum([flags[row] for row in rows], axis=0).sum(1)
+            self.assertEqual(stats["nrow"][i], len(rows))
+            np.testing.assert_array_equal(stats["flagged"][i], expected)
+            np.testing.assert_array_equal(stats["total"][i], 2 * len(rows))
+            self.assertAlmostEqual(stats["fraction"][i],
+                                   expected.sum() / (2. * len(rows) *
+                                                     len(expected)))
+        with self.assertRaises(ValueError):
+            flagstats(ms, by=["ANTENNA1"])
+        stats = flagstats(ms.selectrows(np.flatnonzero(ddid == 0)), by=[],
+                          chunkrows=3)
+        self.assertEqual(stats["nrow"].tolist(), [6])
+        ms.close()
+        tabledelete("ttable.py_tmp.ms1")
+
+    def test_mssummary(self):
+        """Get a summary of the contents of an MS."""
+        ms = default_ms("ttable.py_tmp.ms1")
+        ms.addrows(12)
+        ms.putcol("TIME", np.repeat([5., 15, 25, 35], 3))
+        ms.putcol("SCAN_NUMBER", np.repeat([1, 2], 6))
+        ms.putcol("FIELD_ID", np.repeat([0, 1], 6))
+        ms.putcol("DATA_DESC_ID", np.tile([0, 1], 6))
+        ms.close()
+        fld = table("ttable.py_tmp.ms1/FIELD", readonly=False, ack=False)
+        fld.addrows(2)
+        fld.putcol("NAME", ["3C343", "3C343.1"])
+        for col in ("PHASE_DIR", "DELAY_DIR", "REFERENCE_DIR"):
+            fld.putcol(col, np.array([[[0.5, 0.8]], [[0.6, 0.9]]]))
+        fld.close()
+        spw = table("ttable.py_tmp.ms1/SPECTRAL_WINDOW", readonly=False,
+                    ack=False)
+        spw.addrows(2)
+        spw.putcol("NUM_CHAN", [4, 8])
+        spw.putcol("REF_FREQUENCY", [1e8, 2e8])
+        spw.close()
+        dd = table("ttable.py_tmp.ms1/DATA_DESCRIPTION", readonly=False,
+                   ack=False)
+        dd.addrows(2)
+        dd.putcol("SPECTRAL_WINDOW_ID", [1, 0])
+        dd.close()
+        summ = mssummary("ttable.py_tmp.ms1")
+        self.assertEqual(summ["nrow"], 12)
+        self.assertEqual(summ["timerange"], [5., 35.])
+        self.assertEqual(len(summ["scans"]), 2)
+        self.assertEqual(summ["scans"][1],
+                         {"scan": 2, "field": 1, "ddids": [0, 1],
+                          "start": 25., "end": 35., "nrow": 6})
+        self.assertEqual(summ["fields"][1]["name"], "3C343.1")
+        np.testing.assert_allclose(summ["fields"][1]["direction"],
+                                   [0.6, 0.9])
+        self.assertEqual([x["nchan"] for x in summ["spws"]], [8, 4])
+        self.assertEqual([x["nrow"] for x in summ["spws"]], [6, 6])
+        # Rows without a valid field are not counted for a field.
+        ms = table("ttable.py_tmp.ms1", readonly=False, ack=False)
+        ms.putcell("FIELD_ID", 0, -1)
+        summ = mssummary(ms)
+        self.assertEqual([x["nrow"] for x in summ["fields"]], [5, 6])
+        ms.close()
+        tabledelete("ttable.py_tmp.ms1")
+
+    @unittest.skipIf(not have_xarray, "xarray or dask is not available")
+    def test_to_xarray(self):
+        """Get MS columns as xarray Datasets."""
+        ms = default_ms("ttable.py_tmp.ms1")
+        ms.addrows(11)
+        # Three times of three baselines (one missing) and another ddid.
+        ms.putcol("TIME", [0., 0, 0, 1, 1, 2, 2, 2, 5, 5, 5])
+        ms.putcol("ANTENNA1", [0, 0, 1, 0, 1, 0, 0, 1, 0, 0, 1])
+        ms.putcol("ANTENNA2", [1, 2, 2, 1, 2, 1, 2, 2, 1, 2, 2])
+        ms.putcol("DATA_DESC_ID", [0] * 8 + [1] * 3)
+        ms.putcol("UVW", np.arange(33.).reshape(11, 3))
+        for rownr in range(11):
+            ms.putcell("FLAG", rownr,
+                       np.full((4 if rownr < 8 else 3, 2), rownr % 2 == 1))
+        datasets = to_xarray(ms, ["UVW", "FLAG"], timechunk=2)
+        self.assertEqual([ds.attrs for ds in datasets],
+                         [{"FIELD_ID": 0, "DATA_DESC_ID": 0},
+                          {"FIELD_ID": 0, "DATA_DESC_ID": 1}])
+        ds = datasets[0]
+        self.assertEqual(dict(ds.sizes), {"time": 3, "baseline": 3,
+                                          "uvw": 3, "chan": 4, "corr": 2})
+        self.assertEqual(ds.FLAG.dims, ("time", "baseline", "chan", "corr"))
+        self.assertEqual(ds.antenna1.values.tolist(), [0, 0, 1])
+        self.assertEqual(ds.antenna2.values.tolist(), [1, 2, 2])
+        uvw = ds.UVW.values
+        np.testing.assert_array_equal(uvw[1, 1], [np.nan] * 3)
+        np.testing.assert_array_equal(uvw[2, 2], [21., 22, 23])
+        self.assertEqual(ds.FLAG.values[:, :, 0, 0].tolist(),
+                         [[False, True, False], [True, True, False],
+                          [True, False, True]])
+        self.assertEqual(datasets[1].FLAG.shape, (1, 3, 3, 2))
+        # An empty selection has no partitions or gives an empty Dataset.
+        sel = ms.query("TIME < 0")
+        self.assertEqual(to_xarray(sel, "UVW"), [])
+        ds = to_xarray(sel, ["UVW", "FLAG"], partition_by=[])[0]
+        self.assertEqual(ds.UVW.shape, (0, 0, 3))
+        self.assertEqual(ds.UVW.dtype, np.float64)
+        self.assertEqual(ds.FLAG.dtype, bool)
+        self.assertEqual(ds.UVW.values.shape, (0, 0, 3))
+        ms.close()
+        tabledelete("ttable.py_tmp.ms1")
+
     def test_hypercolumn(self):
         """Test hypercolumns."""
         scd1 = makescacoldesc("col2", "aa")
@@ -652,3 +1032,605 @@ class TestTable(unittest.TestCase):
                     np.all(dminfo["SPEC"]["DEFAULTTILESHAPE"] == [4, 16, 32]))
                 self.assertTrue(np.all(dminfo["SPEC"]["HYPERCUBES"][
                                 "*1"]["TileShape"] == [4, 16, 32]))
+
+    def test_tableselection(self):
+        """Pickle a table selection."""
+        c1 = makescacoldesc("coli", 0)
+        c2 = makescacoldesc("cold", 0.)
+        t = table("ttable.py_tmp.tab1", maketabdesc((c1, c2)), nrow=10,
+                  ack=False)
+        t.putcol("coli", np.arange(10))
+        t.flush()
+        t1 = t.query('coli > 2', sortlist='coli desc', columns='coli')
+        t2 = pickle.loads(pickle.dumps(t1))
+        self.assertEqual(t2.colnames(), ['coli'])
+        np.testing.assert_array_equal(t2.getcol('coli'), t1.getcol('coli'))
+        # Changes are flushed when pickling.
+        t.putcol("cold", np.arange(10.) / 2)
+        t3 = pickle.loads(pickle.dumps(t))
+        self.assertEqual(t3.nrows(), 10)
+        np.testing.assert_array_equal(t3.getcol("cold"), np.arange(10.) / 2)
+        with tableselection(t1, shared=True) as sel:
+            rownrs = sel.rownumbers()
+            sel2 = pickle.loads(pickle.dumps(sel))
+            self.assertEqual(len(sel2), 7)
+            np.testing.assert_array_equal(sel2.rownumbers(),
+                                          t1.rownumbers())
+            np.testing.assert_array_equal(sel2.open().getcol('coli'),
+                                          np.arange(9, 2, -1))
+            sel2.close()
+        # The row numbers are copies, so can be used after closing.
+        np.testing.assert_array_equal(rownrs, t1.rownumbers())
+        t1.close()
+        t2.close()
+        t3.close()
+        t.close()
+        tabledelete("ttable.py_tmp.tab1")
+
+    def test_cellcache(self):
+        """Cache cell values."""
+        c1 = makescacoldesc("coli", 0)
+        c2 = makearrcoldesc("arr", 0., shape=[2, 3])
+        t = table("ttable.py_tmp.tab1", maketabdesc((c1, c2)), nrow=4,
+                  ack=False)
+        t.putcol("coli", np.arange(4))
+        self.assertEqual(t.cellcachestats(), {})
+        t.setcellcache(1000)
+        arr = t.getcell("arr", 1)
+        orig = arr.copy()
+        # A copy is returned, so changing it does not change the cache.
+        arr[0, 0] = 1
+        np.testing.assert_array_equal(t.getcell("arr", 1), orig)
+        t.getcell("coli", 2)
+        stats = t.cellcachestats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['ncells'], 2)
+        t.putcell("arr", 1, np.ones((2, 3)))
+        np.testing.assert_array_equal(t.getcell("arr", 1), np.ones((2, 3)))
+        self.assertEqual(t.getcell("coli", 2), 2)
+        self.assertEqual(t.cellcachestats()['hits'], 2)
+        # Rows are cached as well and put invalidates them.
+        tr = t.row(['coli'])
+        self.assertEqual(tr[3], {'coli': 3})
+        self.assertEqual(tr[3], {'coli': 3})
+        self.assertEqual(t.cellcachestats()['hits'], 3)
+        tr[3] = {'coli': 5}
+        self.assertEqual(tr[3], {'coli': 5})
+        self.assertEqual(t[3]['coli'], 5)
+        # Only the row written is invalidated.
+        hits = t.cellcachestats()['hits']
+        self.assertEqual(t.getcell("coli", 2), 2)
+        self.assertEqual(t.cellcachestats()['hits'], hits + 1)
+        # Eviction keeps the cache within its limit.
+        t.setcellcache(100)
+        for i in range(4):
+            t.getcell("arr", i)
+        stats = t.cellcachestats()
+        self.assertEqual(stats['ncells'], 2)
+        self.assertLessEqual(stats['nbytes'], 100)
+        t.setcellcache(0)
+        self.assertEqual(t.cellcachestats(), {})
+        self.assertTrue(t.getcell("arr", 0).flags.writeable)
+        t.close()
+        tabledelete("ttable.py_tmp.tab1")
+
+    def test_tunecachesize(self):
+        """Tune the cache size of a tiled column."""
+        c1 = makearrcoldesc("data", 0j, shape=[64, 4],
+                            datamanagertype="TiledColumnStMan",
+                            datamanagergroup="tsm")
+        c2 = makescacoldesc("coli", 0)
+        dminfo = makedminfo(maketabdesc(c1),
+                            {"tsm": {"DEFAULTTILESHAPE": [4, 16, 32]}})
+        t = table("ttable.py_tmp.tab1", maketabdesc((c1, c2)),
+                  dminfo=dminfo, nrow=100, ack=False)
+        bucket = t.getdminfo("data")["SPEC"]["HYPERCUBES"]["*1"]["BucketSize"]
+        # A row contains 4 tiles; there are 4 tiles in the row direction.
+        res = t.tunecachesize("data")
+        self.assertEqual(res['cachesize'], 4 * bucket)
+        self.assertEqual(res['tilesread'], 16)
+        self.assertEqual(t.getdmprop("data")['MaxCacheSize'], 4 * bucket)
+        res = t.tunecachesize("data", 'channel', [0, 0], [7, 3])
+        self.assertEqual(res['cachesize'], 16 * bucket)
+        self.assertEqual(res['tilesread'], 16)
+        res = t.tunecachesize("data", 'channel', [0, 0], [7, 3],
+                              limit=2 * bucket, setcache=False)
+        self.assertEqual(res['cachesize'], bucket)
+        self.assertEqual(res['tilesread'], 32)
+        self.assertEqual(t.getdmprop("data")['MaxCacheSize'], 16 * bucket)
+        res = t.tunecachesize("data", 'baseline', nbaseline=10,
+                              limit=4 * bucket)
+        self.assertEqual(res['tilesread'], 160)
+        self.assertRaises(ValueError, t.tunecachesize, "data", 'baseline')
+        self.assertEqual(t.tunecachesize("coli")['cachesize'], 0)
+        t.close()
+        tabledelete("ttable.py_tmp.tab1")
+
+    def test_retile(self):
+        """Retile array columns."""
+        c1 = makearrcoldesc("data", 0j, shape=[64, 4],
+                            datamanagertype="TiledColumnStMan",
+                            datamanagergroup="tsm")
+        c2 = makearrcoldesc("flag", False, shape=[64, 4],
+                            datamanagertype="TiledColumnStMan",
+                            datamanagergroup="tsm")
+        c3 = makescacoldesc("coli", 0)
+        c4 = makearrcoldesc("varr", 0., ndim=2)
+        c5 = makearrcoldesc("undef", 0., ndim=3)
+        dminfo = makedminfo(maketabdesc((c1, c2)),
+                            {"tsm": {"DEFAULTTILESHAPE": [4, 16, 32]}})
+        t = table("ttable.py_tmp.tab1", maketabdesc((c1, c2, c3, c4, c5)),
+                  dminfo=dminfo, nrow=100, ack=False)
+        data = np.arange(25600).reshape(100, 64, 4) * 1j
+        t.putcol("data", data)
+        t.putcol("varr", np.ones((50, 2, 3)), startrow=50)
+        t.putcol("coli", np.arange(100))
+        t.flush()
+        t2 = retile("ttable.py_tmp.tab1", "ttable.py_tmp.tab2", "data",
+                    access='channel', ack=False)
+        spec = t2.getdminfo("data")["SPEC"]
+        self.assertEqual(list(spec["DEFAULTTILESHAPE"]), [4, 8, 100])
+        self.assertEqual(t2.getdminfo("flag")["TYPE"], "TiledColumnStMan")
+        np.testing.assert_array_equal(t2.getcol("data"), data)
+        np.testing.assert_array_equal(t2.getcol("coli"), np.arange(100))
+        t3 = retile(t2.name(), "ttable.py_tmp.tab3", tilesize=65536,
+                    ack=False)
+        self.assertEqual(list(t3.getdminfo("flag")["SPEC"]
+                              ["DEFAULTTILESHAPE"]), [4, 64, 100])
+        self.assertEqual(list(t3.getdminfo("data")["SPEC"]
+                              ["DEFAULTTILESHAPE"]), [4, 64, 16])
+        # The shape of a variable shaped column is taken from its first
+        # defined cell; a column without defined cells is not retiled.
+        self.assertEqual(list(t3.getdminfo("varr")["SPEC"]
+                              ["DEFAULTTILESHAPE"]), [3, 2, 100])
+        self.assertEqual(t3.getdminfo("undef")["TYPE"], "StandardStMan")
+        self.assertFalse(t3.iscelldefined("varr", 49))
+        np.testing.assert_array_equal(t3.getcell("varr", 50), np.ones((2, 3)))
+        # The benchmark only reads the defined cells.
+        t4 = retile(t3.name(), "ttable.py_tmp.tab4", "varr",
+                    access='channel', benchmark=True, ack=False)
+        np.testing.assert_array_equal(t4.getcol("varr", 50),
+                                      np.ones((50, 2, 3)))
+        t.close()
+        t2.close()
+        t3.close()
+        t4.close()
+        tabledelete("ttable.py_tmp.tab1")
+        tabledelete("ttable.py_tmp.tab2")
+        tabledelete("ttable.py_tmp.tab3")
+        tabledelete("ttable.py_tmp.tab4")
+
+    def test_chunkedcopy(self):
+        """Deep copy a table with subtables in chunks."""
+        c1 = makescacoldesc("coli", 0)
+        c2 = makearrcoldesc("arr", 0., shape=[4])
+        t = table("ttable.py_tmp.tab1", maketabdesc((c1, c2)), nrow=50,
+                  ack=False)
+        t.putcol("coli", np.arange(50))
+        sub = table("ttable.py_tmp.tab1/SUB", maketabdesc(c1), nrow=3,
+                    ack=False)
+        sub.putcol("coli", np.arange(3))
+        t.putkeyword("SUB", sub)
+        sub.close()
+        t.flush(recursive=True)
+        done = []
+        t2 = tablecopy("ttable.py_tmp.tab1", "ttable.py_tmp.tab2", deep=True,
+                       chunkrows=20, nproc=2,
+                       progress=lambda name, n, nrow: done.append(n))
+        self.assertEqual(t2.nrows(), 50)
+        np.testing.assert_array_equal(t2.getcol("coli"), np.arange(50))
+        self.assertEqual(sorted(done), [3, 20, 40, 50])
+        sub2 = table(t2.getkeyword("SUB"), ack=False)
+        np.testing.assert_array_equal(sub2.getcol("coli"), np.arange(3))
+        sub2.close()
+        # Partial copy.
+        t3 = t.copy("ttable.py_tmp.tab3", deep=True, copynorows=True,
+                    chunkrows=10)
+        self.assertEqual(t3.nrows(), 0)
+        t.query("coli >= 45").copyrows(t3)
+        np.testing.assert_array_equal(t3.getcol("coli"), np.arange(45, 50))
+        t.close()
+        t2.close()
+        t3.close()
+        tabledelete("ttable.py_tmp.tab1")
+        tabledelete("ttable.py_tmp.tab2")
+        tabledelete("ttable.py_tmp.tab3")
+
+    def test_tablefromascii_fast(self):
+        """Create a table from ASCII using the fast reader."""
+        with open("asciitemp2", "w") as f:
+            f.write("COLI COLD COLX COLR\nI D X2,3 R2\n")
+            for i in range(20):
+                f.write("%d %g %s %d 0.5\n" %
+                        (i, i * 1.5, " ".join(["%d" % x for x in range(12)]),
+                         -i))
+        ta = tablefromascii("ttable.py_tmp.tab1", "asciitemp2", ack=False)
+        tf = tablefromascii("ttable.py_tmp.tab2", "asciitemp2", ack=False,
+                            fast=True, nproc=2)
+        self.assertEqual(tf.nrows(), 20)
+        for col in ta.colnames():
+            self.assertEqual(ta.coldatatype(col), tf.coldatatype(col))
+            np.testing.assert_array_equal(ta.getcol(col), tf.getcol(col))
+        ta.close()
+        tf.close()
+        # Keywords are not supported by the fast reader.
+        with open("asciitemp3", "w") as f:
+            f.write(".keywords\nAUTHOR A \"me\"\n.endkeywords\n"
+                    "COLI COLD\nI D\n")
+        with open("asciitemp4", "w") as f:
+            f.write("1 2.5\n3 4.5\n")
+        tf = tablefromascii("ttable.py_tmp.tab3", "asciitemp4",
+                            headerfile="asciitemp3", ack=False, fast=True)
+        self.assertEqual(tf.getkeyword("AUTHOR"), "me")
+        np.testing.assert_array_equal(tf.getcol("COLD"), [2.5, 4.5])
+        tf.close()
+        # A short and a long line are not shifted into other rows.
+        with open("asciitemp5", "w") as f:
+            f.write("A B\nI I\n1 2\n3\n4 5 6\n7 8\n")
+        ta = tablefromascii("ttable.py_tmp.tab4", "asciitemp5", ack=False)
+        tf = tablefromascii("ttable.py_tmp.tab5", "asciitemp5", ack=False,
+                            fast=True)
+        self.assertEqual(tf.nrows(), ta.nrows())
+        for col in ("A", "B"):
+            np.testing.assert_array_equal(ta.getcol(col), tf.getcol(col))
+        self.assertEqual(tf.getcell("A", 3), 7)
+        ta.close()
+        tf.close()
+        for name in ("asciitemp2", "asciitemp3", "asciitemp4", "asciitemp5"):
+            os.remove(name)
+        for i in range(1, 6):
+            tabledelete("ttable.py_tmp.tab%d" % i)
+
+    def test_tocsv(self):
+        """Write a table in CSV format."""
+        import gzip
+        c1 = makescacoldesc("coli", 0)
+        c2 = makescacoldesc("cols", "")
+        c3 = makearrcoldesc("colc", 0j, shape=[2])
+        c4 = makearrcoldesc("colv", 0.)
+        t = table("ttable.py_tmp.tab1", maketabdesc([c1, c2, c3, c4]),
+                  nrow=5, ack=False)
+        t.putcol("coli", np.arange(5))
+        t.putcol("cols", ["a", "b,c", 'd"e', "", "f"])
+        t.putcol("colc", np.arange(10).reshape(5, 2) * (1 + 0.5j))
+        t.putcell("colv", 0, np.zeros(3))
+        t.tocsv("ttable.py_tmp.csv", chunkrows=2, nproc=2)
+        with open("ttable.py_tmp.csv") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0],
+                         "coli,cols,colc_0_re,colc_0_im,colc_1_re,colc_1_im")
+        self.assertEqual(lines[3], '2,"d""e",4.0,2.0,5.0,2.5')
+        self.assertEqual(len(lines), 6)
+        t.tocsv("ttable.py_tmp.csv.gz", ["coli"], compression="gzip",
+                sep="\t", header=False)
+        with gzip.open("ttable.py_tmp.csv.gz", "rt") as f:
+            self.assertEqual(f.read(), "0\n1\n2\n3\n4\n")
+        t.close()
+        os.remove("ttable.py_tmp.csv")
+        os.remove("ttable.py_tmp.csv.gz")
+        tabledelete("ttable.py_tmp.tab1")
+
+    def test_getvarcol_ragged(self):
+        """Get and put a variable shaped column in ragged form."""
+        c1 = makearrcoldesc("colv", 0.)
+        t = table("ttable.py_tmp.tab1", maketabdesc(c1), nrow=6, ack=False)
+        cells = [np.arange(6.).reshape(2, 3), np.arange(5.).reshape(1, 5),
+                 np.arange(6.).reshape(2, 3) + 10, None,
+                 np.arange(4.).reshape(2, 2)]
+        for rownr, cell in enumerate(cells):
+            if cell is not None:
+                t.putcell("colv", rownr, cell)
+        r = t.getvarcol("colv", 0, 5, ragged=True)
+        np.testing.assert_array_equal(r["shapes"],
+                                      [[2, 3], [1, 5], [2, 3], [0, 0], [2, 2]])
+        np.testing.assert_array_equal(r["offsets"], [0, 6, 11, 17, 17, 21])
+        for rownr, cell in enumerate(cells):
+            if cell is not None:
+                start, end = r["offsets"][rownr:rownr + 2]
+                np.testing.assert_array_equal(
+                    r["values"][start:end].reshape(r["shapes"][rownr]), cell)
+        r = t.getvarcol("colv", 0, 3, 2, ragged=True)
+        np.testing.assert_array_equal(r["shapes"], [[2, 3], [2, 3], [2, 2]])
+        np.testing.assert_array_equal(r["values"][12:], cells[4].ravel())
+        # Write back negated values in the rows 1-5.
+        r = t.getvarcol("colv", 0, 5, ragged=True)
+        r["values"] = -r["values"]
+        t.putvarcol("colv", r, 1)
+        np.testing.assert_array_equal(t.getcell("colv", 1), -cells[0])
+        np.testing.assert_array_equal(t.getcell("colv", 3), -cells[2])
+        # The undefined cell is not written.
+        np.testing.assert_array_equal(t.getcell("colv", 4), cells[4])
+        np.testing.assert_array_equal(t.getcell("colv", 5), -cells[4])
+        tc = tablecolumn(t, "colv")
+        self.assertEqual(len(tc.getvarcol(ragged=True)["values"]), 31)
+        # Long runs of the same shape and a single shape.
+        t.addrows(34)
+        data = np.arange(40 * 6.).reshape(40, 6)
+        t.putcol("colv", data[:20].reshape(20, 2, 3), nrow=20)
+        t.putcol("colv", data[20:].reshape(20, 1, 6), startrow=20)
+        r = t.getvarcol("colv", ragged=True)
+        np.testing.assert_array_equal(r["values"], data.ravel())
+        r["values"] = r["values"] + 1
+        t.putvarcol("colv", r)
+        np.testing.assert_array_equal(t.getcol("colv", 20),
+                                      data[20:].reshape(20, 1, 6) + 1)
+        r = t.getvarcol("colv", 20, ragged=True)
+        np.testing.assert_array_equal(r["values"], data[20:].ravel() + 1)
+        # Only undefined cells still give the dtype of the column.
+        t.addcols(maketabdesc(makearrcoldesc("coli", 0)))
+        r = t.getvarcol("coli", ragged=True)
+        self.assertEqual(r["values"].dtype, np.int32)
+        self.assertEqual(len(r["values"]), 0)
+        np.testing.assert_array_equal(r["offsets"], np.zeros(41))
+        t.close()
+        tabledelete("ttable.py_tmp.tab1")
+
+    def test_getcolshapes(self):
+        """Get the shapes of a column as integers."""
+        c1 = makearrcoldesc("colv", 0.)
+        c2 = makearrcoldesc("colf", 0, shape=[3, 2])
+        t = table("ttable.py_tmp.tab1", maketabdesc([c1, c2]), nrow=5,
+                  ack=False)
+        for rownr in (0, 2, 4):
+            t.putcell("colv", rownr, np.zeros((rownr + 1, 2)))
+        t.putcell("colv", 1, np.zeros((1, 2)))
+        np.testing.assert_array_equal(t.getcolshapes("colv"),
+                                      [[1, 2], [1, 2], [3, 2], [0, 0],
+                                       [5, 2]])
+        np.testing.assert_array_equal(t.getcolshapes("colv", 1, 2, 2),
+                                      [[1, 2], [0, 0]])
+        np.testing.assert_array_equal(t.getcolshapes("colv", 0, 3, 2),
+                                      [[1, 2], [3, 2], [5, 2]])
+        np.testing.assert_array_equal(t.getcolshapes("colv", 2, 2),
+                                      [[3, 2], [0, 0]])
+        np.testing.assert_array_equal(t.getcolshapes("colf"), [[3, 2]] * 5)
+        groups = t.shapegroups("colv")
+        self.assertEqual(sorted(groups.keys()),
+                         [(0, 0), (1, 2), (3, 2), (5, 2)])
+        np.testing.assert_array_equal(groups[(1, 2)], [0, 1])
+        np.testing.assert_array_equal(groups[(0, 0)], [3])
+        tc = tablecolumn(t, "colv")
+        np.testing.assert_array_equal(tc.getshapes(0, 2), [[1, 2], [1, 2]])
+        self.assertEqual(len(tc.shapegroups()), 4)
+        t.close()
+        tabledelete("ttable.py_tmp.tab1")
+
+    def test_getcolslices(self):
+        """Get multiple slices of a column."""
+        c1 = makearrcoldesc("colf", 0., shape=[20, 4])
+        t = table("ttable.py_tmp.tab1", maketabdesc(c1), nrow=6, ack=False)
+        data = np.arange(480.).reshape(6, 20, 4)
+        t.putcol("colf", data)
+        # Slices covering most of the enclosing box.
+        res = t.getcolslices("colf", [([2, 0], [9, 3]),
+                                      ([5, 1], [14, -1], [3, 2]),
+                                      ([], [11])], 1, 4, 1)
+        np.testing.assert_array_equal(res[0], data[1:5, 2:10])
+        np.testing.assert_array_equal(res[1], data[1:5, 5:15:3, 1::2])
+        np.testing.assert_array_equal(res[2], data[1:5, :12])
+        # Small slices far apart are read separately.
+        res = t.getcolslices("colf", [([0], [1]), ([18, 2], [19, 3])],
+                             rowincr=2)
+        np.testing.assert_array_equal(res[0], data[::2, :2])
+        np.testing.assert_array_equal(res[1], data[::2, 18:, 2:])
+        tc = tablecolumn(t, "colf")
+        self.assertEqual(len(tc.getcolslices([([0], [1])])), 1)
+        t.close()
+        tabledelete("ttable.py_tmp.tab1")
+
+    def test_getcol_out(self):
+        """Get data into existing arrays."""
+        c1 = makearrcoldesc("colf", 0., shape=[3, 2])
+        c2 = makescacoldesc("coli", 0)
+        t = table("ttable.py_tmp.tab1", maketabdesc([c1, c2]), nrow=4,
+                  ack=False)
+        data = np.arange(24.).reshape(4, 3, 2)
+        t.putcol("colf", data)
+        t.putcol("coli", np.arange(4))
+        out = np.zeros((4, 3, 2))
+        self.assertIs(t.getcol("colf", out=out), out)
+        np.testing.assert_array_equal(out, data)
+        # Non-contiguous output and type conversion.
+        buf = np.zeros((2, 3, 4), np.float32)
+        t.getcol("colf", 1, 2, out=buf[:, :, ::2])
+        np.testing.assert_array_equal(buf[:, :, ::2], data[1:3])
+        cell = np.zeros((3, 2))
+        t.getcell("colf", 3, out=cell)
+        np.testing.assert_array_equal(cell, data[3])
+        sl = np.zeros((4, 2, 1))
+        t.getcolslice("colf", [1, 1], [2, 1], out=sl)
+        np.testing.assert_array_equal(sl, data[:, 1:3, 1:2])
+        t.getcellslice("colf", 2, [0, 1], [1, 1], out=sl[0])
+        np.testing.assert_array_equal(sl[0], data[2, 0:2, 1:2])
+        tc = tablecolumn(t, "colf")
+        tc.getcell(0, out=cell)
+        np.testing.assert_array_equal(cell, data[0])
+        tc.getcol(out=out)
+        np.testing.assert_array_equal(out, data)
+        tr = t.row()
+        row = tr.get(1)
+        res = tr.get(2, out=row)
+        self.assertIs(res["colf"], row["colf"])
+        np.testing.assert_array_equal(row["colf"], data[2])
+        self.assertEqual(res["coli"], 2)
+        # int64 buffers cannot be filled directly, so are copied into.
+        iout = np.zeros(4, np.int64)
+        self.assertIs(t.getcol("coli", out=iout), iout)
+        np.testing.assert_array_equal(iout, np.arange(4))
+        iout = np.zeros((4, 3, 2), np.int64)
+        t.getcol("colf", out=iout)
+        np.testing.assert_array_equal(iout, data)
+        t.getcolslice("colf", [1, 1], [2, 1], out=iout[:, :2, :1])
+        np.testing.assert_array_equal(iout[:, :2, :1], data[:, 1:3, 1:2])
+        t.getcell("colf", 1, out=iout[0])
+        np.testing.assert_array_equal(iout[0], data[1])
+        t.close()
+        tabledelete("ttable.py_tmp.tab1")
+
+    def test_getcol_transform(self):
+        """Get a complex column as amplitude, phase, etc."""
+        c1 = makearrcoldesc("colc", 0j, shape=[3, 2], valuetype="complex")
+        t = table("ttable.py_tmp.tab1", maketabdesc(c1), nrow=5, ack=False)
+        data = (np.arange(30.) - 1j * np.arange(30.)[::-1]).reshape(5, 3, 2)
+        t.putcol("colc", data)
+        data = data.astype(np.complex64)
+        amp = t.getcol("colc", transform="amp")
+        self.assertEqual(amp.dtype, np.float32)
+        np.testing.assert_allclose(amp, np.abs(data))
+        np.testing.assert_allclose(t.getcol("colc", 1, 2, 2, transform="phase"),
+                                   np.angle(data[1:5:2]), rtol=1e-6)
+        np.testing.assert_array_equal(t.getcol("colc", transform="imag"),
+                                      data.imag)
+        real = t._getcoltransformed("colc", 0, -1, 1, None, np.real,
+                                    np.float16, chunkbytes=50)
+        self.assertEqual(real.dtype, np.float16)
+        np.testing.assert_array_equal(real, data.real.astype(np.float16))
+        out = np.zeros((5, 3, 2), np.float32)
+        tc = tablecolumn(t, "colc")
+        self.assertIs(tc.getcol(out=out, transform="real"), out)
+        np.testing.assert_array_equal(out, data.real)
+        with self.assertRaises(ValueError):
+            t.getcol("colc", transform="power")
+        # The imaginary part is not silently dropped.
+        with self.assertRaises(TypeError):
+            t.getcol("colc", dtype=float)
+        amp = t.getcol("colc", transform="amp", dtype=np.float16)
+        np.testing.assert_array_equal(amp, np.abs(data).astype(np.float16))
+        self.assertEqual(t.getcol("colc", dtype=np.complex128).dtype,
+                         np.complex128)
+        t.close()
+        tabledelete("ttable.py_tmp.tab1")
+
+    def test_getcol_masked(self):
+        """Get a data column as a masked array."""
+        c1 = makearrcoldesc("DATA", 0j, shape=[3, 2], valuetype="complex")
+        c2 = makearrcoldesc("FLAG", False, shape=[3, 2])
+        c3 = makescacoldesc("FLAG_ROW", False)
+        t = table("ttable.py_tmp.tab1", maketabdesc([c1, c2, c3]), nrow=5,
+                  ack=False)
+        data = (np.arange(30.) + 1j).reshape(5, 3, 2)
+        flag = np.zeros((5, 3, 2), bool)
+        flag[0, 1, 0] = True
+        flag[3, 2] = True
+        t.putcol("DATA", data)
+        t.putcol("FLAG", flag)
+        t.putcell("FLAG_ROW", 2, True)
+        res = t.getcol_masked("DATA", chunkrows=2)
+        self.assertIsInstance(res, np.ma.MaskedArray)
+        np.testing.assert_array_equal(res.data, data)
+        flag[2] = True
+        np.testing.assert_array_equal(res.mask, flag)
+        res = t.getcol_masked("DATA", startrow=1, nrow=2, rowincr=2,
+                              flagrowcol=None, transform="real")
+        np.testing.assert_array_equal(res.data, data[1:5:2].real)
+        np.testing.assert_array_equal(res.mask, [flag[1], flag[3]])
+        t.close()
+        tabledelete("ttable.py_tmp.tab1")
+
+    def test_getcol_packbits(self):
+        """Get and put flags packed in bits."""
+        c1 = makearrcoldesc("FLAG", False, shape=[11, 2])
+        c2 = makescacoldesc("FLAG_ROW", False)
+        t = table("ttable.py_tmp.tab1", maketabdesc([c1, c2]), nrow=5,
+                  ack=False)
+        flag = np.arange(110).reshape(5, 11, 2) % 3 == 0
+        t.putcol("FLAG", flag)
+        t.putcol("FLAG_ROW", [True, False, False, True, True])
+        packed = t.getcol("FLAG", packbits=True)
+        self.assertEqual(packed.dtype, np.uint8)
+        self.assertEqual(packed.shape, (5, 2, 2))
+        np.testing.assert_array_equal(packed, np.packbits(flag, axis=1))
+        np.testing.assert_array_equal(t.getcol("FLAG_ROW", packbits=True),
+                                      [0b10011000])
+        t.putcol("FLAG", ~packed[:2], 3, packed=True)
+        np.testing.assert_array_equal(t.getcol("FLAG", 3), ~flag[:2])
+        t.putcol("FLAG_ROW", np.packbits([False, True]), 1, 2, packed=True)
+        np.testing.assert_array_equal(t.getcol("FLAG_ROW"),
+                                      [True, False, True, True, True])
+        with self.assertRaises(ValueError):
+            t.putcol("FLAG", packed, 1, 3, packed=True)
+        t.close()
+        tabledelete("ttable.py_tmp.tab1")
+
+    def test_partition(self):
+        """Partition a table for parallel processing."""
+        c1 = makescacoldesc("TIME", 0.)
+        c2 = makescacoldesc("ANTENNA1", 0)
+        c3 = makescacoldesc("ANTENNA2", 0)
+        c4 = makearrcoldesc("DATA", 0j, shape=[4, 2])
+        td = maketabdesc([c1, c2, c3, c4])
+        dminfo = {"*1": {"TYPE": "TiledColumnStMan", "NAME": "tsm",
+                         "SPEC": {"DEFAULTTILESHAPE": [2, 4, 10]},
+                         "COLUMNS": ["DATA"]}}
+        t = table("ttable.py_tmp.tab1", td, nrow=60, dminfo=dminfo,
+                  ack=False)
+        t.putcol("TIME", np.repeat(np.arange(20.), 3))
+        t.putcol("ANTENNA1", np.tile([0, 0, 1], 20))
+        t.putcol("ANTENNA2", np.tile([1, 2, 2], 20))
+        parts = t.partition(4)
+        self.assertEqual([p.rowrange() for p in parts],
+                         [(0, 20), (20, 10), (30, 10), (40, 20)])
+        parts = t.partition(4, align_to_tiles=False)
+        self.assertEqual([p.rowrange() for p in parts],
+                         [(0, 15), (15, 15), (30, 15), (45, 15)])
+        parts = t.partition(4, by="time", align_to_tiles=False)
+        self.assertEqual([p.rowrange() for p in parts],
+                         [(0, 15), (15, 15), (30, 15), (45, 15)])
+        parts = t.partition(4, by="time")
+        self.assertEqual([p.rowrange() for p in parts],
+                         [(0, 21), (21, 9), (30, 9), (39, 21)])
+        part = pickle.loads(pickle.dumps(parts[1]))
+        tp = part.open()
+        np.testing.assert_array_equal(tp.getcol("TIME"),
+                                      np.repeat([7., 8, 9], 3))
+        tp.close()
+        parts = t.partition(2, by="baseline")
+        self.assertEqual(sorted([len(p) for p in parts]), [20, 40])
+        tp = parts[1].open()
+        self.assertEqual(set(tp.getcol("ANTENNA2")), {2})
+        tp.close()
+        # Unsorted times; no more parts than times.
+        t.putcol("TIME", np.tile([3., 1], 30))
+        parts = t.partition(4, by="time")
+        self.assertEqual([len(p) for p in parts], [30, 30])
+        tp = parts[1].open()
+        self.assertEqual(set(tp.getcol("TIME")), {3.})
+        tp.close()
+        t.close()
+        tabledelete("ttable.py_tmp.tab1")
+
+    @unittest.skipIf(not have_dask, "dask is not available")
+    def test_to_dask(self):
+        """Get a column as a dask array."""
+        c1 = makescacoldesc("TIME", 0.)
+        c2 = makearrcoldesc("DATA", 0j, shape=[4, 2])
+        td = maketabdesc([c1, c2])
+        dminfo = {"*1": {"TYPE": "TiledColumnStMan", "NAME": "tsm",
+                         "SPEC": {"DEFAULTTILESHAPE": [2, 4, 10]},
+                         "COLUMNS": ["DATA"]}}
+        t = table("ttable.py_tmp.tab1", td, nrow=60, dminfo=dminfo,
+                  ack=False)
+        data = (np.arange(480) * (1 + 1j)).reshape(60, 4, 2)
+        t.putcol("TIME", np.arange(60.))
+        t.putcol("DATA", data)
+        t.flush()
+        arr = t.to_dask("DATA")
+        self.assertEqual(arr.shape, (60, 4, 2))
+        self.assertEqual(arr.dtype, np.complex128)
+        np.testing.assert_array_equal(arr.compute(), data)
+        arr = t.to_dask("DATA", chunks=(25, 2, -1))
+        self.assertEqual(arr.chunks, ((25, 25, 10), (2, 2), (2,)))
+        np.testing.assert_array_equal(arr[:, 1:3].compute(), data[:, 1:3])
+        arr = pickle.loads(pickle.dumps(t.to_dask("TIME", chunks=16)))
+        self.assertEqual(arr.sum().compute(), 1770.)
+        t1 = t.query("TIME >= 50")
+        np.testing.assert_array_equal(t1.to_dask("TIME").compute(),
+                                      np.arange(50., 60))
+        # An empty selection gives an empty array.
+        arr = t.query("TIME < 0").to_dask("DATA")
+        self.assertEqual(arr.shape, (0, 4, 2))
+        self.assertEqual(arr.dtype, np.complex128)
+        self.assertEqual(arr.compute().shape, (0, 4, 2))
+        t.close()
+        tabledelete("ttable.py_tmp.tab1")